@@ -0,0 +1,354 @@
+import base64
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class AnalysisCatalog:
+    # Columns clients may sort listings by
+    SORTABLE_COLUMNS = ("timestamp", "overall_score", "analysis_id")
+    # Indexed score fields available to queries, as {column: (section, key)}
+    # in the stored results ("metrics", "human_sentiment", ...)
+    SCORE_COLUMNS = {
+        "proximity_score": ("metrics", "proximity_score"),
+        "object_duration_percentage": ("metrics", "object_duration_percentage"),
+        "sentiment_score": ("sentiment", "score"),
+        "facial_score": ("human_sentiment", "facial_score"),
+        "body_score": ("human_sentiment", "body_score"),
+        "human_score": ("human_sentiment", "combined_score"),
+        "text_vocal_score": ("text_vocal_sentiment", "combined_score"),
+        "vocal_score": ("text_vocal_sentiment", "vocal_score")
+    }
+    QUERY_COLUMNS = ("timestamp", "overall_score", "analysis_id") + tuple(SCORE_COLUMNS)
+    # Bumped whenever indexed fields are added; older catalogs are migrated
+    # and flagged for a rebuild from disk
+    SCHEMA_VERSION = 2
+
+    def __init__(self, db_path: str):
+        """
+        Persistent SQLite index of stored analyses
+
+        Holds the small per-analysis fields needed for listing and lookups
+        (timestamp, score, content hash, file paths), so listing never has to
+        open the analysis JSON files. The catalog can always be rebuilt from
+        the files on disk (StorageManager.rebuild_catalog).
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Set when an existing catalog was migrated and its new columns still need filling
+        self.needs_rebuild = False
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self):
+        conn = self._connect()
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            has_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analyses'"
+            ).fetchone() is not None
+
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    analysis_id TEXT PRIMARY KEY,
+                    timestamp TEXT NOT NULL,
+                    overall_score REAL,
+                    content_hash TEXT,
+                    pipeline_version TEXT,
+                    video_path TEXT,
+                    json_path TEXT,
+                    report_path TEXT,
+                    frames_path TEXT
+                );
+                CREATE TABLE IF NOT EXISTS analysis_products (
+                    analysis_id TEXT NOT NULL,
+                    product TEXT NOT NULL COLLATE NOCASE,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (analysis_id, product)
+                );
+                CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_analyses_score ON analyses (overall_score);
+                CREATE INDEX IF NOT EXISTS idx_analyses_content ON analyses (content_hash, pipeline_version, timestamp);
+                CREATE INDEX IF NOT EXISTS idx_products_product ON analysis_products (product, analysis_id);
+            """)
+
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(analyses)")}
+            for column in self.SCORE_COLUMNS:
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE analyses ADD COLUMN {column} REAL NOT NULL DEFAULT 0")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_analyses_{column} ON analyses ({column}, analysis_id)")
+
+            if version < self.SCHEMA_VERSION:
+                self.needs_rebuild = has_table
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        finally:
+            conn.close()
+
+    @classmethod
+    def score_fields(cls, results: Dict[str, Any]) -> Dict[str, float]:
+        """Indexed score columns read from an analysis results dictionary"""
+        fields = {}
+        for column, (section, key) in cls.SCORE_COLUMNS.items():
+            value = (results.get(section) or {}).get(key)
+            fields[column] = float(value) if isinstance(value, (int, float)) else 0.0
+        return fields
+
+    @classmethod
+    def _insert(cls, conn: sqlite3.Connection, entry: Dict[str, Any]):
+        columns = ["analysis_id", "timestamp", "overall_score", "content_hash", "pipeline_version",
+                   "video_path", "json_path", "report_path", "frames_path"] + list(cls.SCORE_COLUMNS)
+        values = {column: entry.get(column) for column in columns}
+        for column in cls.SCORE_COLUMNS:
+            values[column] = values[column] or 0.0
+        conn.execute(
+            f"INSERT OR REPLACE INTO analyses ({', '.join(columns)}) "
+            f"VALUES ({', '.join(':' + column for column in columns)})",
+            values
+        )
+
+        conn.execute("DELETE FROM analysis_products WHERE analysis_id = ?", (entry["analysis_id"],))
+        for product, count in (entry.get("products") or {}).items():
+            conn.execute(
+                "INSERT INTO analysis_products (analysis_id, product, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (analysis_id, product) DO UPDATE SET count = count + excluded.count",
+                (entry["analysis_id"], product, int(count or 0))
+            )
+
+    def add(self, entry: Dict[str, Any]):
+        """Insert or replace one analysis entry in a single transaction"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._insert(conn, entry)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def remove(self, analysis_id: str) -> bool:
+        """Remove one analysis; returns False if it was not in the catalog"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            removed = conn.execute("DELETE FROM analyses WHERE analysis_id = ?", (analysis_id,)).rowcount
+            conn.execute("DELETE FROM analysis_products WHERE analysis_id = ?", (analysis_id,))
+            conn.execute("COMMIT")
+            return removed > 0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def update_paths(self, updates: Iterable[Tuple[str, str, str]]):
+        """
+        Point stored file paths at new locations in a single transaction
+
+        Args:
+            updates: (analysis_id, path column, new path) tuples; unknown analyses are ignored
+        """
+        path_columns = ("video_path", "json_path", "report_path", "frames_path")
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for analysis_id, column, path in updates:
+                if column not in path_columns:
+                    raise ValueError(f"Not a path column: '{column}'")
+                conn.execute(f"UPDATE analyses SET {column} = ? WHERE analysis_id = ?", (path, analysis_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def replace_all(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """
+        Atomically replace the whole catalog (used when rebuilding from disk)
+
+        Returns:
+            Number of entries written
+        """
+        conn = self._connect()
+        count = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM analyses")
+            conn.execute("DELETE FROM analysis_products")
+            for entry in entries:
+                self._insert(conn, entry)
+                count += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return count
+
+    def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM analyses WHERE analysis_id = ?", (analysis_id,)).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def find_by_content(self, content_hash: str, pipeline_version: str) -> Optional[Dict[str, Any]]:
+        """Most recent analysis of this content by this pipeline version"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM analyses WHERE content_hash = ? AND pipeline_version = ? "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (content_hash, pipeline_version)
+            ).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        finally:
+            conn.close()
+
+    def list(self, limit: Optional[int] = None, offset: int = 0,
+             sort_by: str = "timestamp", descending: bool = True) -> List[Dict[str, Any]]:
+        """
+        One page of analyses, read through the sort column's index
+
+        Args:
+            limit: Maximum number of entries (all if None)
+            offset: Number of entries to skip
+            sort_by: One of SORTABLE_COLUMNS
+            descending: Sort order
+
+        Returns:
+            List of catalog entries
+        """
+        if sort_by not in self.SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'; expected one of {', '.join(self.SORTABLE_COLUMNS)}")
+        direction = "DESC" if descending else "ASC"
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM analyses ORDER BY {sort_by} {direction}, analysis_id {direction} "
+                "LIMIT ? OFFSET ?",
+                (-1 if limit is None else int(limit), max(int(offset), 0))
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None,
+              min_scores: Optional[Dict[str, float]] = None, max_scores: Optional[Dict[str, float]] = None,
+              products: Sequence[str] = (), sort_by: str = "timestamp", descending: bool = True,
+              limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Filtered, sorted page of analyses with keyset (cursor) pagination
+
+        Every filter and sort column is indexed, and pages continue from the
+        last row seen rather than skipping rows, so deep pages cost the same
+        as the first one.
+
+        Args:
+            since: Only analyses stored at or after this ISO timestamp
+            until: Only analyses stored before this ISO timestamp
+            min_scores: {column: minimum value} over QUERY_COLUMNS score fields
+            max_scores: {column: maximum value} over QUERY_COLUMNS score fields
+            products: Product names that must all have been detected (case-insensitive)
+            sort_by: One of QUERY_COLUMNS
+            descending: Sort order
+            limit: Page size
+            cursor: next_cursor returned by the previous page
+
+        Returns:
+            (catalog entries with their detected products, cursor of the next page or None)
+        """
+        if sort_by not in self.QUERY_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'; expected one of {', '.join(self.QUERY_COLUMNS)}")
+
+        conditions, params = [], []
+        if since:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        for bounds, operator in ((min_scores, ">="), (max_scores, "<=")):
+            for column, value in (bounds or {}).items():
+                if column not in self.QUERY_COLUMNS or column in ("timestamp", "analysis_id"):
+                    raise ValueError(f"Cannot filter on '{column}'")
+                conditions.append(f"{column} {operator} ?")
+                params.append(float(value))
+        for product in products:
+            conditions.append(
+                "EXISTS (SELECT 1 FROM analysis_products p WHERE p.analysis_id = analyses.analysis_id AND p.product = ?)"
+            )
+            params.append(product)
+
+        comparison = "<" if descending else ">"
+        if cursor:
+            last_value, last_id = self._decode_cursor(cursor)
+            if sort_by == "analysis_id":
+                conditions.append(f"analysis_id {comparison} ?")
+                params.append(last_id)
+            else:
+                conditions.append(f"({sort_by} {comparison} ? OR ({sort_by} = ? AND analysis_id {comparison} ?))")
+                params.extend([last_value, last_value, last_id])
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = "DESC" if descending else "ASC"
+        limit = max(int(limit), 1)
+
+        conn = self._connect()
+        try:
+            rows = [dict(row) for row in conn.execute(
+                f"SELECT * FROM analyses {where} ORDER BY {sort_by} {direction}, analysis_id {direction} LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()]
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            if rows:
+                placeholders = ", ".join("?" for _ in rows)
+                products_by_id = {}
+                for row in conn.execute(
+                    f"SELECT analysis_id, product, count FROM analysis_products WHERE analysis_id IN ({placeholders})",
+                    [row["analysis_id"] for row in rows]
+                ):
+                    products_by_id.setdefault(row["analysis_id"], {})[row["product"]] = row["count"]
+                for row in rows:
+                    row["products"] = products_by_id.get(row["analysis_id"], {})
+        finally:
+            conn.close()
+
+        next_cursor = self._encode_cursor(rows[-1][sort_by], rows[-1]["analysis_id"]) if has_more else None
+        return rows, next_cursor
+
+    @staticmethod
+    def _encode_cursor(value: Any, analysis_id: str) -> str:
+        raw = json.dumps([value, analysis_id], separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+        try:
+            value, analysis_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return value, str(analysis_id)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
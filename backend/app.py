@@ -2,23 +2,22 @@ import os
 import cv2
 import numpy as np
 import base64
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import uuid
 import asyncio
+import re
+import multiprocessing
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import queue
+from datetime import datetime
 from typing import Optional
-import whisper
-from transformers import pipeline
-from moviepy.editor import VideoFileClip
-import matplotlib.pyplot as plt
-from ultralytics import YOLO
-import tempfile
-import torch
-import librosa
-from transformers import AutoFeatureExtractor, Wav2Vec2ForSequenceClassification
-import mediapipe as mp
-from deepface import DeepFace
 from typing import Dict, Tuple, List
 import warnings
 
@@ -27,8 +26,23 @@ warnings.filterwarnings('ignore')
 
 
 from storage_manager import StorageManager
+from frame_source import FrameSource, FrameViews
+from scene_change import SceneChangeDetector
+from model_registry import model_registry
+from transcription_cache import TranscriptionCache
+from stage_graph import StageGraph
+from job_queue import SQLiteJobQueue
+from upload_ingest import stream_upload_to_disk, UploadError
+from tracker import IoUTracker
+from frame_series import FrameSeries
+from audio_extraction import load_audio_16k_mono, SAMPLE_RATE
+from vad import EnergyVAD
+from progress_events import ProgressBroadcaster, format_sse
 
-storage_manager = StorageManager()
+storage_manager = StorageManager(os.getenv("VIDEO_STORAGE_PATH", "./video_analysis_storage"))
+
+# Transcripts keyed by audio content + model + options, shared by every stage
+transcription_cache = TranscriptionCache(os.path.join(storage_manager.base_storage_path, "transcripts"))
 
 app = FastAPI()
 
@@ -41,15 +55,119 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variables for models (load once)
-yolo_model = None
-whisper_model = None
-sentiment_analyzer = None
-vocal_emotion_model = None
-vocal_emotion_extractor = None
+# Durable job queue shared by every API process and worker on this storage volume
+VIDEO_ANALYSIS_JOB = "video_analysis"
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", str(7 * 24 * 3600)))
+JOB_CLEANUP_INTERVAL_SECONDS = 3600
+# Seconds between background audits of the storage statistics (0 disables;
+# the totals are maintained on store/delete, audits only correct drift)
+STORAGE_AUDIT_INTERVAL_SECONDS = int(os.getenv("STORAGE_AUDIT_INTERVAL_SECONDS", "0"))
+job_queue = SQLiteJobQueue(os.getenv("JOB_QUEUE_DB", os.path.join(storage_manager.base_storage_path, "jobs.db")))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+job_available = asyncio.Event()
+
+# Push progress (SSE / WebSocket): one shared status read per interval for all subscribers
+PROGRESS_POLL_SECONDS = float(os.getenv("PROGRESS_POLL_SECONDS", "0.5"))
+PROGRESS_KEEPALIVE_SECONDS = 15
+progress_broadcaster = ProgressBroadcaster(job_queue.get_statuses, interval=PROGRESS_POLL_SECONDS)
+
+# Uploads waiting for analysis; must be reachable by every worker that can claim the job.
+# Defaults to the storage volume so finished uploads are renamed into videos/, not copied
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", storage_manager.incoming_dir)
+
+# Whether this API process also runs analysis jobs. Set to 0 on API-only
+# nodes when dedicated worker.py processes pull the jobs instead.
+RUN_EMBEDDED_WORKERS = os.getenv("RUN_EMBEDDED_WORKERS", "1") == "1"
+
+# Number of analysis worker processes (each holds its own warm models).
+# 0 runs analyses on a thread of the API process instead.
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "1"))
+analysis_pool = None
+# Pools seen raising BrokenProcessPool (a worker process died)
+broken_pools = set()
+
+# Pool workers announce themselves on the status queue once warm
+WORKER_READY_MESSAGE = "__worker_ready__"
+ready_workers = {}
+
+# Maximum number of pipeline stages (visual, audio, transcription, ...) run concurrently per video
+PIPELINE_STAGE_WORKERS = int(os.getenv("PIPELINE_STAGE_WORKERS", "4"))
+
+# Largest accepted video upload
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "4096")) * 1024 * 1024
+
+# How models are loaded at startup:
+#   "eager"      - load everything before accepting traffic
+#   "background" - accept traffic immediately and warm models on a thread
+#   "lazy"       - load each model on first use
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background").lower()
+
+# Whisper checkpoint shared by every transcription stage
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "base")
+
+# Human sentiment stage samples one frame every N seconds of video
+HUMAN_SAMPLE_INTERVAL_SECONDS = 2
+
+# Longest side of the RGB/grayscale view used for pose, face detection and face crops
+HUMAN_FRAME_MAX_SIDE = int(os.getenv("HUMAN_FRAME_MAX_SIDE", "640"))
+
+# Face crops sent to the emotion classifier per inference call
+FACE_BATCH_SIZE = int(os.getenv("FACE_BATCH_SIZE", "32"))
+FACE_MIN_CONFIDENCE = float(os.getenv("FACE_MIN_CONFIDENCE", "0.5"))
+
+# Frame size fed to YOLO and used for blur/proximity scoring
+DETECTION_FRAME_SIZE = (1020, 500)
+
+# Rows of per-frame chart data embedded in the results (LTTB-downsampled);
+# the full series is stored as .npz and served by /storage/analysis/{id}/frames
+FRAME_SERIES_POINTS = int(os.getenv("FRAME_SERIES_POINTS", "500"))
+# Series whose shape the downsampling preserves
+FRAME_CHART_SERIES = ("proximity", "blurriness")
+
+# Number of frames sent to YOLO per inference call (1 = frame-by-frame)
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))
 
-# Task storage
-tasks = {}
+# "adaptive" runs YOLO only on scene changes/keyframes, "all" on every frame
+DETECTION_SAMPLING = os.getenv("DETECTION_SAMPLING", "adaptive").lower()
+DETECTION_MAX_KEYFRAME_INTERVAL = int(os.getenv("DETECTION_MAX_KEYFRAME_INTERVAL", "15"))
+
+# Transcription: "vad" runs Whisper only on voiced regions, grouped into chunks
+# of at most TRANSCRIBE_CHUNK_SECONDS and transcribed on TRANSCRIBE_WORKERS
+# threads (one Whisper instance each); "full" transcribes the whole track.
+# Regions only share a chunk across pauses of up to TRANSCRIBE_MAX_GAP_SECONDS
+TRANSCRIBE_MODE = os.getenv("TRANSCRIBE_MODE", "vad").lower()
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "30"))
+TRANSCRIBE_MAX_GAP_SECONDS = float(os.getenv("TRANSCRIBE_MAX_GAP_SECONDS", "1"))
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "2"))
+
+# Transcript sentiment: the transcript is split into sentences of at most
+# SENTIMENT_SEGMENT_TOKENS tokens, scored SENTIMENT_BATCH_SIZE at a time
+SENTIMENT_SEGMENT_TOKENS = int(os.getenv("SENTIMENT_SEGMENT_TOKENS", "256"))
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+
+# Vocal emotion: "windowed" scores overlapping windows in batches (bounded
+# memory, per-window timeline), "full" runs one pass over the whole clip
+VOCAL_EMOTION_MODE = os.getenv("VOCAL_EMOTION_MODE", "windowed").lower()
+VOCAL_WINDOW_SECONDS = float(os.getenv("VOCAL_WINDOW_SECONDS", "4"))
+VOCAL_HOP_SECONDS = float(os.getenv("VOCAL_HOP_SECONDS", "2"))
+VOCAL_BATCH_SIZE = int(os.getenv("VOCAL_BATCH_SIZE", "8"))
+# Skip windows that the energy VAD marks as mostly silent
+VOCAL_VAD = os.getenv("VOCAL_VAD", "1") == "1"
+VOCAL_MIN_SPEECH_FRACTION = 0.3
+
+# Identifies the analysis pipeline for result reuse; stored results are only
+# reused for identical uploads analyzed with the same version string
+PIPELINE_VERSION = "|".join([
+    "pipeline-2",
+    f"whisper-{WHISPER_MODEL_NAME}",
+    f"detect-{DETECTION_SAMPLING}-{DETECTION_MAX_KEYFRAME_INTERVAL}",
+    f"transcribe-{TRANSCRIBE_MODE}-{TRANSCRIBE_CHUNK_SECONDS}-{TRANSCRIBE_MAX_GAP_SECONDS}",
+    f"sentiment-{SENTIMENT_SEGMENT_TOKENS}",
+    f"vocal-{VOCAL_EMOTION_MODE}-{VOCAL_WINDOW_SECONDS}-{VOCAL_HOP_SECONDS}-{int(VOCAL_VAD)}"
+])
 
 class AnalysisTask(BaseModel):
     task_id: str
@@ -59,51 +177,233 @@ class AnalysisTask(BaseModel):
     message: Optional[str] = None
     storage_info: Optional[dict] = None
 
+class AnalysisQuery(BaseModel):
+    since: Optional[str] = None  # ISO date/time, inclusive
+    until: Optional[str] = None  # ISO date/time, exclusive
+    min_scores: Dict[str, float] = {}  # e.g. {"human_score": 60}
+    max_scores: Dict[str, float] = {}  # e.g. {"overall_score": 40}
+    products: List[str] = []  # every listed product must have been detected
+    sort: str = "timestamp"
+    order: str = "desc"
+    limit: int = 50
+    cursor: Optional[str] = None  # next_cursor of the previous page
+
+# Heavy ML libraries (torch, ultralytics, whisper, transformers, mediapipe,
+# deepface) are imported inside the functions that use them,
+# so importing this module and starting the API stays fast.
+
+def load_yolo_model():
+    # Add the safe globals before loading YOLO
+    import torch.serialization
+    from ultralytics import YOLO
+    from ultralytics.nn.tasks import DetectionModel
+    torch.serialization.add_safe_globals([DetectionModel])
+    
+    return YOLO('best.pt')  # Replace with your model path
+
+def load_whisper_model():
+    import whisper
+    return whisper.load_model(WHISPER_MODEL_NAME)
+
+def load_sentiment_analyzer():
+    from transformers import pipeline
+    try:
+        return pipeline(
+            "sentiment-analysis", 
+            model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
+            tokenizer="cardiffnlp/twitter-xlm-roberta-base-sentiment"
+        )
+    except Exception as e:
+        print(f"Warning: Could not load default sentiment analyzer. Falling back to English-only model. Error: {str(e)}")
+        return pipeline("sentiment-analysis")
+
+def load_face_emotion_model():
+    from deepface import DeepFace
+    try:
+        model = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+    except TypeError:
+        # Older DeepFace releases take the model name only
+        model = DeepFace.build_model("Emotion")
+    # Newer releases wrap the Keras model in a client object
+    return getattr(model, "model", model)
+
+def load_vocal_emotion_model():
+    from transformers import AutoFeatureExtractor, Wav2Vec2ForSequenceClassification
+    model_id = "superb/wav2vec2-base-superb-er"
+    extractor = AutoFeatureExtractor.from_pretrained(model_id)
+    model = Wav2Vec2ForSequenceClassification.from_pretrained(model_id)
+    model.eval()
+    return extractor, model
+
+# Every model is loaded once per worker process and reused across requests
+model_registry.register("yolo", load_yolo_model, "best.pt")
+model_registry.register("whisper", load_whisper_model, f"whisper-{WHISPER_MODEL_NAME}")
+model_registry.register("sentiment", load_sentiment_analyzer, "cardiffnlp/twitter-xlm-roberta-base-sentiment")
+model_registry.register("vocal_emotion", load_vocal_emotion_model, "superb/wav2vec2-base-superb-er")
+model_registry.register("face_emotion", load_face_emotion_model, "deepface-emotion")
+
 def initialize_models():
-    global yolo_model, whisper_model, sentiment_analyzer, vocal_emotion_model, vocal_emotion_extractor
     try:
-        print("Loading YOLO model...")
-        # Add the safe globals before loading YOLO
-        import torch.serialization
-        from ultralytics.nn.tasks import DetectionModel
-        torch.serialization.add_safe_globals([DetectionModel])
-        
-        yolo_model = YOLO('best.pt')  # Replace with your model path
-        print("YOLO model loaded successfully!")
-        
-        print("Loading Whisper model...")
-        whisper_model = whisper.load_model("base")
-        print("Whisper model loaded successfully!")
-        
-        print("Loading sentiment analyzer...")
-        try:
-            sentiment_analyzer = pipeline(
-                "sentiment-analysis", 
-                model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
-                tokenizer="cardiffnlp/twitter-xlm-roberta-base-sentiment"
-            )
-            print("Sentiment analyzer loaded successfully!")
-        except Exception as e:
-            print(f"Warning: Could not load default sentiment analyzer. Falling back to English-only model. Error: {str(e)}")
-            sentiment_analyzer = pipeline("sentiment-analysis")
-            print("English sentiment analyzer loaded as fallback")
-        
-        print("Loading vocal emotion model...")
-        model_id = "superb/wav2vec2-base-superb-er"
-        vocal_emotion_extractor = AutoFeatureExtractor.from_pretrained(model_id)
-        vocal_emotion_model = Wav2Vec2ForSequenceClassification.from_pretrained(model_id)
-        print("Vocal emotion model loaded successfully!")
-        
+        model_registry.load_all()
     except Exception as e:
         print(f"Error loading models: {str(e)}")
         raise
 
 @app.on_event("startup")
 async def startup_event():
-    initialize_models()
+    asyncio.create_task(cleanup_jobs_periodically())
+    if STORAGE_AUDIT_INTERVAL_SECONDS > 0:
+        asyncio.create_task(audit_storage_periodically())
+    if not RUN_EMBEDDED_WORKERS:
+        print("Embedded workers disabled: jobs are processed by worker.py processes")
+        return
+
+    asyncio.create_task(dispatch_jobs())
+    if ANALYSIS_WORKERS > 0:
+        # Models live in the pool workers; the API process stays light
+        start_analysis_pool()
+    elif STARTUP_MODE == "eager":
+        initialize_models()
+    elif STARTUP_MODE == "background":
+        model_registry.warm_up_in_background()
+    else:
+        print("Lazy startup: models will load on first use")
+
+def transcribe_audio(audio, **options) -> Dict:
+    """
+    Transcribe an audio track through the transcription cache, so Whisper
+    runs at most once per distinct audio content, model and option set.
+
+    Returns:
+        Dictionary with text, segments and language
+    """
+    return transcription_cache.get_or_transcribe(
+        audio,
+        WHISPER_MODEL_NAME,
+        lambda audio_input, **kwargs: model_registry.get("whisper").transcribe(audio_input, **kwargs),
+        **options
+    )
+
+# Whisper installs decoding hooks on the model for each call, so chunks
+# transcribed concurrently each borrow their own instance. The first one is the
+# registry's shared model; extra instances are created on demand.
+whisper_instances = queue.Queue()
+whisper_instance_count = 0
+whisper_instance_lock = threading.Lock()
+
+@contextmanager
+def borrow_whisper_model():
+    global whisper_instance_count
+    try:
+        model = whisper_instances.get_nowait()
+    except queue.Empty:
+        with whisper_instance_lock:
+            create = whisper_instance_count < max(TRANSCRIBE_WORKERS, 1)
+            if create:
+                whisper_instance_count += 1
+                first = whisper_instance_count == 1
+        if create:
+            model = model_registry.get("whisper") if first else load_whisper_model()
+        else:
+            model = whisper_instances.get()
+    try:
+        yield model
+    finally:
+        whisper_instances.put(model)
+
+def transcribe_with_pool(audio, **options) -> Dict:
+    """Transcribe through the cache using a borrowed Whisper instance"""
+    def run_whisper(audio_input, **kwargs):
+        with borrow_whisper_model() as model:
+            return model.transcribe(audio_input, **kwargs)
+
+    return transcription_cache.get_or_transcribe(audio, WHISPER_MODEL_NAME, run_whisper, **options)
+
+def speech_chunks(audio: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Group the voiced regions of the audio into chunks for Whisper
+
+    Silence and music-only stretches (EnergyVAD's speech/music check) are
+    left out, so Whisper neither spends time on nor hallucinates over them.
+    Consecutive regions separated by a pause of at most
+    TRANSCRIBE_MAX_GAP_SECONDS share a chunk while it stays within
+    TRANSCRIBE_CHUNK_SECONDS; longer gaps (e.g. a music interlude) start a
+    new chunk so they are never sent to Whisper. Longer regions are split.
+
+    Returns:
+        List of (start_sample, end_sample)
+    """
+    max_length = int(TRANSCRIBE_CHUNK_SECONDS * SAMPLE_RATE)
+    max_gap = int(TRANSCRIBE_MAX_GAP_SECONDS * SAMPLE_RATE)
+    chunks = []
+    for start_seconds, end_seconds in EnergyVAD(sample_rate=SAMPLE_RATE).speech_regions(audio):
+        start, end = int(start_seconds * SAMPLE_RATE), int(end_seconds * SAMPLE_RATE)
+        if chunks and start - chunks[-1][1] <= max_gap and end - chunks[-1][0] <= max_length:
+            chunks[-1] = (chunks[-1][0], end)
+            continue
+        while end - start > max_length:
+            chunks.append((start, start + max_length))
+            start += max_length
+        chunks.append((start, end))
+    return chunks
+
+def transcribe_speech(audio: np.ndarray, progress_callback=None) -> Dict:
+    """
+    Transcribe only the voiced parts of the audio
+
+    Speech chunks are transcribed independently (and concurrently), each
+    through the transcription cache; segment timestamps are shifted back to
+    the position of their chunk in the full track.
+
+    Args:
+        audio: 16 kHz mono float32 samples
+        progress_callback: Optional callable(chunks_done, chunk_count)
+
+    Returns:
+        Dictionary with text, segments and language
+    """
+    if TRANSCRIBE_MODE == "full":
+        return transcribe_audio(audio)
+
+    chunks = speech_chunks(audio)
+    voiced_seconds = sum(end - start for start, end in chunks) / SAMPLE_RATE
+    print(f"Transcribing {len(chunks)} speech chunks ({voiced_seconds:.1f}s of {len(audio) / SAMPLE_RATE:.1f}s)")
+    if not chunks:
+        return {"text": "", "language": None, "segments": []}
+
+    results = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(TRANSCRIBE_WORKERS, len(chunks)))) as executor:
+        futures = {
+            executor.submit(transcribe_with_pool, audio[start:end]): index
+            for index, (start, end) in enumerate(chunks)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(done, len(chunks))
+
+    segments = []
+    for (start, _), result in zip(chunks, results):
+        offset = start / SAMPLE_RATE
+        segments.extend(
+            {
+                "start": round(segment["start"] + offset, 2),
+                "end": round(segment["end"] + offset, 2),
+                "text": segment["text"].strip()
+            }
+            for segment in result["segments"]
+        )
+
+    # Language of the chunk with the most speech
+    longest = max(range(len(chunks)), key=lambda index: chunks[index][1] - chunks[index][0])
+    return {
+        "text": " ".join(result["text"].strip() for result in results if result["text"].strip()),
+        "language": results[longest]["language"],
+        "segments": segments
+    }
 
 def calculate_blurriness(image):
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
     return cv2.Laplacian(gray, cv2.CV_64F).var()
 
 def calculate_proximity(bbox):
@@ -112,304 +412,953 @@ def calculate_proximity(bbox):
 def get_color(value):
     return 'red' if value < 25 else 'orange' if value < 50 else 'lightgreen' if value < 75 else 'darkgreen'
 
-def analyze_sentiment(text):
+def split_transcript(text: str, tokenizer, max_tokens: int) -> List[Tuple[str, int]]:
+    """
+    Split a transcript into sentences of at most max_tokens tokens
+
+    Sentences that are still too long are cut at token boundaries.
+
+    Returns:
+        List of (segment text, token count)
+    """
+    sentences = [sentence.strip() for sentence in re.split(r"(?<=[.!?।])\s+", text) if sentence.strip()]
+    if not sentences:
+        return []
+
+    segments = []
+    encodings = tokenizer(sentences, add_special_tokens=False, return_offsets_mapping=tokenizer.is_fast)
+    for index, sentence in enumerate(sentences):
+        token_count = len(encodings["input_ids"][index])
+        if token_count <= max_tokens or not tokenizer.is_fast:
+            segments.append((sentence, min(token_count, max_tokens)))
+            continue
+
+        offsets = encodings["offset_mapping"][index]
+        for start in range(0, token_count, max_tokens):
+            piece = offsets[start:start + max_tokens]
+            segments.append((sentence[piece[0][0]:piece[-1][1]].strip(), len(piece)))
+    return [(segment, tokens) for segment, tokens in segments if segment]
+
+def score_transcript_sentiment(text: str) -> Dict:
+    """
+    Score the full transcript with the sentiment model in one batched pass
+
+    Every segment is scored; the aggregate label probabilities are the
+    segment probabilities weighted by token count.
+
+    Returns:
+        Dictionary with label, score (aggregate confidence), probabilities
+        and per-segment results
+    """
+    if not text.strip():
+        return {"label": "neutral", "score": 0.5, "probabilities": {}, "segments": []}
+
+    sentiment_pipeline = model_registry.get("sentiment")
+    segments = split_transcript(text, sentiment_pipeline.tokenizer, SENTIMENT_SEGMENT_TOKENS)
+    outputs = sentiment_pipeline(
+        [segment for segment, _ in segments],
+        batch_size=SENTIMENT_BATCH_SIZE,
+        truncation=True,
+        top_k=None
+    )
+
+    totals: Dict[str, float] = {}
+    total_tokens = 0
+    segment_results = []
+    for (segment, tokens), scores in zip(segments, outputs):
+        probabilities = {item["label"].lower(): float(item["score"]) for item in scores}
+        best = max(probabilities, key=probabilities.get)
+        segment_results.append({"text": segment, "label": best, "score": probabilities[best], "tokens": tokens})
+        for label, probability in probabilities.items():
+            totals[label] = totals.get(label, 0.0) + probability * tokens
+        total_tokens += tokens
+
+    probabilities = {label: total / max(total_tokens, 1) for label, total in totals.items()}
+    label = max(probabilities, key=probabilities.get)
+    return {
+        "label": label,
+        "score": probabilities[label],
+        "probabilities": probabilities,
+        "segments": segment_results
+    }
+
+def map_sentiment(scored: Dict) -> Dict:
+    """Map scored transcript sentiment to the five sentiment categories"""
+    label = scored['label']
+    score = scored['score']
+
+    # Mapping to 5 categories
+    if label == "negative":
+        sentiment = "Very Bad" if score > 0.65 else "Bad"
+        sentiment_score = 0 if score > 0.65 else 25
+    elif label == "neutral":
+        sentiment = "Neutral"
+        sentiment_score = 50
+    elif label == "positive":
+        sentiment = "Very Good" if score > 0.65 else "Good"
+        sentiment_score = 100 if score > 0.65 else 75
+    else:
+        sentiment = "Neutral"
+        sentiment_score = 50
+
+    return {
+        "sentiment": sentiment,
+        "score": sentiment_score,
+        "raw_label": label,
+        "raw_score": score,
+        "segments": scored.get("segments", [])
+    }
+
+def analyze_sentiment(text, scored: Dict = None):
     if not text.strip():
         return {
             "sentiment": "Neutral",
             "score": 50,
             "raw_label": "neutral",
-            "raw_score": 0.5
+            "raw_score": 0.5,
+            "segments": []
         }
     
     try:
-        result = sentiment_analyzer(text)[0]
-        label = result['label']
-        score = result['score']
-
-        # Mapping to 5 categories
-        if label == "negative":
-            sentiment = "Very Bad" if score > 0.65 else "Bad"
-            sentiment_score = 0 if score > 0.65 else 25
-        elif label == "neutral":
-            sentiment = "Neutral"
-            sentiment_score = 50
-        elif label == "positive":
-            sentiment = "Very Good" if score > 0.65 else "Good"
-            sentiment_score = 100 if score > 0.65 else 75
-        else:
-            sentiment = "Neutral"
-            sentiment_score = 50
-
-        return {
-            "sentiment": sentiment,
-            "score": sentiment_score,
-            "raw_label": label,
-            "raw_score": score
-        }
+        return map_sentiment(scored or score_transcript_sentiment(text))
     except Exception as e:
         print(f"Sentiment analysis error: {str(e)}")
         return {
             "sentiment": "Neutral",
             "score": 50,
             "raw_label": "error",
-            "raw_score": 0.5
+            "raw_score": 0.5,
+            "segments": []
         }
 
-def analyze_human_sentiment(video_path: str) -> Dict:
+class HumanSentimentAnalyzer:
     """
-    Analyze facial expressions and body language for emotional sentiment
+    Frame consumer that scores facial expressions and body language.
+    Feed it sampled frames with process_frame(), then call finalize().
+
+    Faces are located with MediaPipe face detection first; only the face
+    crops reach the emotion classifier, FACE_BATCH_SIZE crops per call.
     """
-    print("\n[2/5] 😊 Analyzing Human Face & Body Language...")
-    
-    try:
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_interval = max(int(fps * 2), 1)  # Sample every 2 seconds
-        
+
+    # Output order of the DeepFace emotion classifier
+    emotion_labels = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+    # Map emotion to promotional effectiveness score
+    emotion_mapping = {
+        'happy': 90,
+        'surprise': 75,
+        'neutral': 50,
+        'sad': 25,
+        'angry': 15,
+        'fear': 20,
+        'disgust': 10
+    }
+
+    def __init__(self, fps: float = None):
+        import mediapipe as mp
+
         # Initialize MediaPipe Pose for body language
-        mp_pose = mp.solutions.pose
-        pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
-        
-        facial_emotions = []
-        body_language_scores = []
-        frames_with_humans = 0
-        frames_analyzed = 0
-        
-        frame_idx = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_idx % frame_interval == 0:
-                frames_analyzed += 1
-                
-                # FACIAL EMOTION ANALYSIS using DeepFace
+        self.mp_pose = mp.solutions.pose
+        self.pose = self.mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.5)
+
+        # Full-range face detector, gates the emotion classifier
+        self.face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=1, min_detection_confidence=FACE_MIN_CONFIDENCE
+        )
+
+        self.fps = fps
+        self.facial_emotions = []
+        self.faces = []
+        self.pending_faces = []
+        self.body_language_scores = []
+        self.frames_with_humans = 0
+        self.frames_analyzed = 0
+
+    def detect_faces(self, views: FrameViews) -> List[Tuple[Tuple[int, int, int, int], np.ndarray]]:
+        """
+        Find faces and prepare classifier input crops
+
+        Detection and crops both use the shared HUMAN_FRAME_MAX_SIDE views.
+
+        Returns:
+            List of (bbox as x1, y1, x2, y2 in full-frame pixels, 48x48 float32 grayscale crop)
+        """
+        results = self.face_detection.process(views.rgb(HUMAN_FRAME_MAX_SIDE))
+        if not results.detections:
+            return []
+
+        gray_frame = views.gray(max_side=HUMAN_FRAME_MAX_SIDE)
+        height, width = gray_frame.shape[:2]
+        full_height, full_width = views.frame.shape[:2]
+        faces = []
+        for detection in results.detections:
+            box = detection.location_data.relative_bounding_box
+            # Small margin so the crop covers the whole face like DeepFace's aligner
+            margin_x, margin_y = box.width * 0.1, box.height * 0.1
+            x1 = int(max(0.0, box.xmin - margin_x) * width)
+            y1 = int(max(0.0, box.ymin - margin_y) * height)
+            x2 = int(min(1.0, box.xmin + box.width + margin_x) * width)
+            y2 = int(min(1.0, box.ymin + box.height + margin_y) * height)
+            if x2 - x1 < 8 or y2 - y1 < 8:
+                continue
+
+            crop = cv2.resize(gray_frame[y1:y2, x1:x2], (48, 48)).astype(np.float32) / 255.0
+            bbox = (
+                int(x1 * full_width / width), int(y1 * full_height / height),
+                int(x2 * full_width / width), int(y2 * full_height / height)
+            )
+            faces.append((bbox, crop))
+        return faces
+
+    def flush_faces(self):
+        """Run the emotion classifier on all pending face crops in one batch"""
+        if not self.pending_faces:
+            return
+        pending, self.pending_faces = self.pending_faces, []
+
+        model = model_registry.get("face_emotion")
+        batch = np.stack([crop for _, _, crop in pending])[..., np.newaxis]
+        predictions = np.asarray(model.predict(batch, verbose=0))
+
+        for (frame_idx, bbox, _), probs in zip(pending, predictions):
+            pred_id = int(np.argmax(probs))
+            dominant_emotion = self.emotion_labels[pred_id]
+            facial_score = self.emotion_mapping.get(dominant_emotion, 50)
+            confidence = float(probs[pred_id]) * 100
+            self.facial_emotions.append({
+                'emotion': dominant_emotion,
+                'score': facial_score,
+                'confidence': confidence
+            })
+            self.faces.append({
+                'frame': frame_idx,
+                'time': round(frame_idx / self.fps, 2) if self.fps else None,
+                'bbox': list(bbox),
+                'emotion': dominant_emotion,
+                'score': facial_score,
+                'confidence': confidence
+            })
+
+    def process_frame(self, frame_idx: int, views: FrameViews):
+        self.frames_analyzed += 1
+
+        # FACIAL EMOTION ANALYSIS: detect faces, queue crops for the batched classifier
+        # A failure only drops this frame's faces; crops queued from earlier frames stay in the batch
+        try:
+            faces = self.detect_faces(views)
+        except Exception as face_error:
+            print(f"   ⚠ Face analysis failed on frame {frame_idx}: {face_error}")
+            faces = []
+
+        if faces:
+            self.frames_with_humans += 1
+            self.pending_faces.extend((frame_idx, bbox, crop) for bbox, crop in faces)
+            if len(self.pending_faces) >= FACE_BATCH_SIZE:
                 try:
-                    face_analysis = DeepFace.analyze(frame, actions=['emotion'], enforce_detection=False, silent=True)
-                    
-                    if isinstance(face_analysis, list):
-                        face_analysis = face_analysis[0]
-                    
-                    dominant_emotion = face_analysis['dominant_emotion']
-                    emotion_scores = face_analysis['emotion']
-                    
-                    # Map emotion to promotional effectiveness score
-                    emotion_mapping = {
-                        'happy': 90,
-                        'surprise': 75,
-                        'neutral': 50,
-                        'sad': 25,
-                        'angry': 15,
-                        'fear': 20,
-                        'disgust': 10
-                    }
-                    
-                    facial_score = emotion_mapping.get(dominant_emotion, 50)
-                    facial_emotions.append({
-                        'emotion': dominant_emotion,
-                        'score': facial_score,
-                        'confidence': emotion_scores[dominant_emotion]
-                    })
-                    frames_with_humans += 1
-                    
+                    self.flush_faces()
                 except Exception as face_error:
-                    # No face detected in this frame
-                    pass
-                
-                # BODY LANGUAGE ANALYSIS using MediaPipe Pose
-                try:
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    results = pose.process(rgb_frame)
-                    
-                    if results.pose_landmarks:
-                        landmarks = results.pose_landmarks.landmark
-                        
-                        # Analyze body openness (arms, posture)
-                        # Higher shoulder position = more confidence
-                        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER]
-                        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-                        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP]
-                        
-                        # Shoulder-to-hip ratio indicates posture
-                        shoulder_height = (left_shoulder.y + right_shoulder.y) / 2
-                        posture_score = max(0, 100 - (shoulder_height * 100))
-                        
-                        # Arm openness (spread = confidence)
-                        left_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST]
-                        right_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST]
-                        arm_spread = abs(left_wrist.x - right_wrist.x)
-                        openness_score = min(arm_spread * 100, 100)
-                        
-                        body_score = posture_score * 0.6 + openness_score * 0.4
-                        body_language_scores.append(body_score)
-                        
-                except Exception as body_error:
-                    pass
-            
-            frame_idx += 1
-        
-        cap.release()
-        pose.close()
-        
+                    print(f"   ⚠ Face emotion batch failed at frame {frame_idx}: {face_error}")
+
+        # BODY LANGUAGE ANALYSIS using MediaPipe Pose
+        try:
+            results = self.pose.process(views.rgb(HUMAN_FRAME_MAX_SIDE))
+
+            if results.pose_landmarks:
+                landmarks = results.pose_landmarks.landmark
+                mp_pose = self.mp_pose
+
+                # Analyze body openness (arms, posture)
+                # Higher shoulder position = more confidence
+                left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER]
+                right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER]
+                left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP]
+
+                # Shoulder-to-hip ratio indicates posture
+                shoulder_height = (left_shoulder.y + right_shoulder.y) / 2
+                posture_score = max(0, 100 - (shoulder_height * 100))
+
+                # Arm openness (spread = confidence)
+                left_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST]
+                right_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST]
+                arm_spread = abs(left_wrist.x - right_wrist.x)
+                openness_score = min(arm_spread * 100, 100)
+
+                body_score = posture_score * 0.6 + openness_score * 0.4
+                self.body_language_scores.append(body_score)
+
+        except Exception as body_error:
+            pass
+
+    def finalize(self) -> Dict:
+        try:
+            self.flush_faces()
+        except Exception as face_error:
+            print(f"   ⚠ Face analysis failed: {face_error}")
+        self.pose.close()
+        self.face_detection.close()
+
         # Calculate averages
-        if facial_emotions:
-            avg_facial_score = np.mean([f['score'] for f in facial_emotions])
-            dominant_emotions = [f['emotion'] for f in facial_emotions]
+        if self.facial_emotions:
+            avg_facial_score = np.mean([f['score'] for f in self.facial_emotions])
+            dominant_emotions = [f['emotion'] for f in self.facial_emotions]
             most_common_emotion = max(set(dominant_emotions), key=dominant_emotions.count)
         else:
             avg_facial_score = 50
             most_common_emotion = "neutral"
-        
-        avg_body_score = np.mean(body_language_scores) if body_language_scores else 50
-        
+
+        avg_body_score = np.mean(self.body_language_scores) if self.body_language_scores else 50
+
         # Combined human sentiment score
         combined_human_score = avg_facial_score * 0.7 + avg_body_score * 0.3
-        
-        human_presence = (frames_with_humans / frames_analyzed * 100) if frames_analyzed > 0 else 0
-        
+
+        human_presence = (self.frames_with_humans / self.frames_analyzed * 100) if self.frames_analyzed > 0 else 0
+
         print(f"   ✓ Human presence: {human_presence:.1f}% of frames")
         print(f"   ✓ Dominant facial emotion: {most_common_emotion}")
         print(f"   ✓ Facial sentiment score: {avg_facial_score:.1f}%")
         print(f"   ✓ Body language score: {avg_body_score:.1f}%")
         print(f"   ✓ Combined human sentiment: {combined_human_score:.1f}%")
-        
+
         return {
             'facial_score': avg_facial_score,
             'body_score': avg_body_score,
             'combined_score': combined_human_score,
             'human_presence': human_presence,
             'dominant_emotion': most_common_emotion,
-            'total_emotions_detected': len(facial_emotions)
+            'total_emotions_detected': len(self.facial_emotions),
+            'faces': self.faces
         }
-    
-    except Exception as e:
-        print(f"   ✗ Error in human sentiment analysis: {e}")
+
+    @staticmethod
+    def default_result() -> Dict:
         return {
             'facial_score': 50,
             'body_score': 50,
             'combined_score': 50,
             'human_presence': 0,
             'dominant_emotion': 'unknown',
-            'total_emotions_detected': 0
+            'total_emotions_detected': 0,
+            'faces': []
         }
+
+
+def analyze_human_sentiment(video_path: str) -> Dict:
+    """
+    Analyze facial expressions and body language for emotional sentiment
+    """
+    print("\n[2/5] 😊 Analyzing Human Face & Body Language...")
     
-def analyze_text_vocal_sentiment(audio_path: str) -> Dict:
+    try:
+        source = FrameSource(video_path)
+        analyzer = HumanSentimentAnalyzer(fps=source.fps)
+        source.subscribe(analyzer.process_frame, every_seconds=HUMAN_SAMPLE_INTERVAL_SECONDS, name="human_sentiment")
+        source.run()
+        return analyzer.finalize()
+    
+    except Exception as e:
+        print(f"   ✗ Error in human sentiment analysis: {e}")
+        return HumanSentimentAnalyzer.default_result()
+    
+def default_text_vocal_result() -> Dict:
+    return {
+        'transcript': "",
+        'text_sentiment_label': "Neutral",
+        'text_sentiment_score': 50,
+        'vocal_emotion': "Neutral",
+        'vocal_score': 50,
+        'vocal_emotion_timeline': [],
+        'combined_score': 50
+    }
+
+def analyze_text_sentiment(transcript: str, scored: Dict = None) -> Dict:
+    """
+    Score the transcript for promotional text sentiment
+
+    Args:
+        transcript: Full transcript
+        scored: Result of score_transcript_sentiment, if already computed
+    """
+    if not transcript.strip():
+        return {'label': "neutral", 'score': 50}
+
+    # TEXT SENTIMENT ANALYSIS
+    print("   → Analyzing text sentiment...")
+    sentiment_result = scored or score_transcript_sentiment(transcript)
+    
+    # Map to promotional effectiveness score
+    sentiment_mapping = {
+        'positive': 85,
+        'neutral': 50,
+        'negative': 20
+    }
+    
+    sentiment_label = sentiment_result['label'].lower()
+    confidence = sentiment_result['score']
+    base_score = sentiment_mapping.get(sentiment_label, 50)
+    text_score = base_score * confidence + (50 * (1 - confidence))
+    
+    print(f"   ✓ Text sentiment: {sentiment_label.upper()} ({text_score:.1f}%)")
+    return {'label': sentiment_label, 'score': text_score}
+
+# Vocal emotion label prefix -> (display name, score)
+VOCAL_EMOTION_MAPPING = {
+    'hap': ('Happy', 90),
+    'exc': ('Excited', 95),
+    'neu': ('Neutral', 55),
+    'ang': ('Angry', 20),
+    'sad': ('Sad', 15),
+    'fru': ('Frustrated', 25),
+    'fea': ('Fearful', 20),
+    'sur': ('Surprised', 70),
+    'dis': ('Disgusted', 10)
+}
+
+def map_vocal_emotion(raw_emotion: str) -> Tuple[str, int]:
+    return VOCAL_EMOTION_MAPPING.get(raw_emotion[:3].lower(), ('Neutral', 50))
+
+def vocal_emotion_windows(speech_array: np.ndarray) -> List[Tuple[int, int, float]]:
+    """
+    Split the audio into fixed-length overlapping windows
+
+    The last window is aligned to the end of the clip so every window has the
+    same length. With VOCAL_VAD enabled, windows that are mostly silence or
+    music (EnergyVAD's speech/music check) are skipped, so a music bed never
+    reaches wav2vec2 or the aggregate; the speech fraction of each window
+    weights it in the aggregate.
+
+    Returns:
+        List of (start_sample, end_sample, speech_fraction)
+    """
+    window = int(VOCAL_WINDOW_SECONDS * SAMPLE_RATE)
+    hop = max(1, int(VOCAL_HOP_SECONDS * SAMPLE_RATE))
+    total = len(speech_array)
+
+    if total <= window:
+        starts = [0]
+    else:
+        starts = list(range(0, total - window + 1, hop))
+        if starts[-1] + window < total:
+            starts.append(total - window)
+
+    vad = EnergyVAD(sample_rate=SAMPLE_RATE) if VOCAL_VAD else None
+    mask = vad.speech_mask(speech_array) if vad else None
+
+    windows = []
+    for start in starts:
+        end = min(start + window, total)
+        fraction = vad.speech_fraction(mask, start, end) if vad else 1.0
+        if fraction >= VOCAL_MIN_SPEECH_FRACTION:
+            windows.append((start, end, fraction))
+    return windows
+
+def analyze_vocal_emotion(speech_array: np.ndarray) -> Dict:
+    """
+    Recognize the speaker's vocal emotion from the audio track
+
+    In "windowed" mode (VOCAL_EMOTION_MODE) the audio is scored in overlapping
+    windows, VOCAL_BATCH_SIZE at a time, so peak memory does not depend on
+    the video length. Window probabilities are averaged (weighted by speech
+    fraction) into the overall emotion. "full" mode scores the whole clip in
+    a single forward pass.
+
+    Args:
+        speech_array: 16 kHz mono float32 samples
+
+    Returns:
+        Dictionary with emotion, score and a per-window timeline
+    """
+    import torch
+
+    # VOCAL EMOTION RECOGNITION
+    print("   → Analyzing vocal emotion...")
+    extractor, model = model_registry.get("vocal_emotion")
+
+    span = None
+    if VOCAL_EMOTION_MODE == "full":
+        if VOCAL_VAD:
+            # Score the voiced speech only, not silence or a music bed around it
+            regions = EnergyVAD(sample_rate=SAMPLE_RATE).speech_regions(speech_array)
+            if regions:
+                span = (regions[0][0], regions[-1][1])
+                speech_array = np.concatenate([
+                    speech_array[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] for start, end in regions
+                ])
+            windows = [(0, len(speech_array), 1.0)] if regions else []
+        else:
+            windows = [(0, len(speech_array), 1.0)]
+    else:
+        windows = vocal_emotion_windows(speech_array)
+
+    if not windows:
+        print("   ⚠ No voiced audio for vocal emotion")
+        return {'emotion': "Neutral", 'score': 50, 'timeline': []}
+
+    timeline = []
+    weighted_probs = None
+    total_weight = 0.0
+    for batch_start in range(0, len(windows), VOCAL_BATCH_SIZE):
+        batch = windows[batch_start:batch_start + VOCAL_BATCH_SIZE]
+        inputs = extractor(
+            [speech_array[start:end] for start, end, _ in batch],
+            sampling_rate=SAMPLE_RATE, return_tensors="pt", padding=True
+        )
+
+        with torch.no_grad():
+            logits = model(**inputs).logits
+            batch_probs = torch.softmax(logits, dim=-1).cpu().numpy()
+
+        for (start, end, fraction), probs in zip(batch, batch_probs):
+            pred_id = int(np.argmax(probs))
+            emotion, score = map_vocal_emotion(model.config.id2label[pred_id])
+            timeline.append({
+                'start': round(start / SAMPLE_RATE, 2),
+                'end': round(end / SAMPLE_RATE, 2),
+                'emotion': emotion,
+                'score': score,
+                'confidence': float(probs[pred_id]),
+                'speech_fraction': round(fraction, 2)
+            })
+
+            weighted_probs = probs * fraction if weighted_probs is None else weighted_probs + probs * fraction
+            total_weight += fraction
+
+    if span is not None:
+        # The single full-mode window was scored on the concatenated voiced regions
+        timeline[0]['start'], timeline[0]['end'] = round(span[0], 2), round(span[1], 2)
+
+    mean_probs = weighted_probs / max(total_weight, 1e-9)
+    vocal_emotion, vocal_score = map_vocal_emotion(model.config.id2label[int(np.argmax(mean_probs))])
+
+    print(f"   ✓ Vocal emotion: {vocal_emotion} ({vocal_score}%) over {len(timeline)} windows")
+    return {'emotion': vocal_emotion, 'score': vocal_score, 'timeline': timeline}
+
+def combine_text_vocal(transcript: str, text_result: Dict, vocal_result: Dict) -> Dict:
+    """
+    Join text sentiment and vocal emotion into the text_vocal_sentiment result
+    """
+    if not transcript.strip():
+        print("   ⚠ No speech detected in audio")
+        return default_text_vocal_result()
+
+    # COMBINED TEXT & VOCAL SCORE
+    combined_score = text_result['score'] * 0.5 + vocal_result['score'] * 0.5
+    
+    return {
+        'transcript': transcript,
+        'text_sentiment_label': text_result['label'].capitalize(),
+        'text_sentiment_score': text_result['score'],
+        'vocal_emotion': vocal_result['emotion'],
+        'vocal_score': vocal_result['score'],
+        'vocal_emotion_timeline': vocal_result.get('timeline', []),
+        'combined_score': combined_score
+    }
+
+def analyze_text_vocal_sentiment(media_path: str) -> Dict:
     """
     Analyze text sentiment from transcription and vocal emotion from audio
     """
     print("\n[3/5] 🎤 Analyzing Text & Vocal Sentiment...")
     
     try:
+        audio = load_audio_16k_mono(media_path)
+        if audio is None:
+            print("   ⚠ No audio track found")
+            return default_text_vocal_result()
+
         # TRANSCRIPTION
         print("   → Transcribing audio...")
-        whisper_model = whisper.load_model("base")
-        result = whisper_model.transcribe(audio_path)
-        transcript = result["text"]
+        transcript = transcribe_speech(audio)["text"]
         
         if not transcript.strip():
             print("   ⚠ No speech detected in audio")
-            return {
-                'transcript': "",
-                'text_sentiment_label': "Neutral",
-                'text_sentiment_score': 50,
-                'vocal_emotion': "Neutral",
-                'vocal_score': 50,
-                'combined_score': 50
-            }
+            return default_text_vocal_result()
         
         print(f"   ✓ Transcript: \"{transcript[:100]}...\"")
         
-        # TEXT SENTIMENT ANALYSIS
-        print("   → Analyzing text sentiment...")
-        sentiment_pipeline = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-            device=0 if torch.cuda.is_available() else -1
-        )
-        
-        sentiment_result = sentiment_pipeline(transcript[:512])[0]
-        
-        # Map to promotional effectiveness score
-        sentiment_mapping = {
-            'positive': 85,
-            'neutral': 50,
-            'negative': 20
-        }
-        
-        sentiment_label = sentiment_result['label'].lower()
-        confidence = sentiment_result['score']
-        base_score = sentiment_mapping.get(sentiment_label, 50)
-        text_score = base_score * confidence + (50 * (1 - confidence))
-        
-        print(f"   ✓ Text sentiment: {sentiment_label.upper()} ({text_score:.1f}%)")
-        
-        # VOCAL EMOTION RECOGNITION
-        print("   → Analyzing vocal emotion...")
-        model_id = "superb/wav2vec2-base-superb-er"
-        extractor = AutoFeatureExtractor.from_pretrained(model_id)
-        model = Wav2Vec2ForSequenceClassification.from_pretrained(model_id)
-        
-        speech_array, sr = librosa.load(audio_path, sr=16000)
-        inputs = extractor(speech_array, sampling_rate=16000, return_tensors="pt", padding=True)
-        
-        with torch.no_grad():
-            logits = model(**inputs).logits
-            probs = torch.softmax(logits, dim=-1).cpu().numpy()[0]
-        
-        pred_id = int(np.argmax(probs))
-        raw_emotion = model.config.id2label[pred_id]
-        
-        # Map emotion to score
-        emotion_mapping = {
-            'hap': ('Happy', 90),
-            'exc': ('Excited', 95),
-            'neu': ('Neutral', 55),
-            'ang': ('Angry', 20),
-            'sad': ('Sad', 15),
-            'fru': ('Frustrated', 25),
-            'fea': ('Fearful', 20),
-            'sur': ('Surprised', 70),
-            'dis': ('Disgusted', 10)
-        }
-        
-        emotion_key = raw_emotion[:3].lower()
-        vocal_emotion, vocal_score = emotion_mapping.get(emotion_key, ('Neutral', 50))
-        
-        print(f"   ✓ Vocal emotion: {vocal_emotion} ({vocal_score}%)")
-        
-        # COMBINED TEXT & VOCAL SCORE
-        combined_score = text_score * 0.5 + vocal_score * 0.5
-        
-        return {
-            'transcript': transcript,
-            'text_sentiment_label': sentiment_label.capitalize(),
-            'text_sentiment_score': text_score,
-            'vocal_emotion': vocal_emotion,
-            'vocal_score': vocal_score,
-            'combined_score': combined_score
-        }
+        return combine_text_vocal(transcript, analyze_text_sentiment(transcript), analyze_vocal_emotion(audio))
     
     except Exception as e:
         print(f"   ✗ Error in text/vocal analysis: {e}")
-        return {
-            'transcript': "",
-            'text_sentiment_label': "Neutral",
-            'text_sentiment_score': 50,
-            'vocal_emotion': "Neutral",
-            'vocal_score': 50,
-            'combined_score': 50
-        }
+        return default_text_vocal_result()
+
+
+class ObjectDetectionStage:
+    """
+    Frame consumer that runs YOLO and blur scoring on every frame and keeps
+    the per-frame bookkeeping used for the visual metrics.
+
+    Frames are buffered and sent to YOLO in batches of `batch_size`; call
+    finish() after the last frame to flush the remaining partial batch.
+    With adaptive sampling only keyframes (scene changes) reach YOLO and the
+    frames in between reuse the previous keyframe's detections, so every
+    frame still contributes one frame_time to the duration metrics.
+    """
+
+    def __init__(self, frame_time: float, batch_size: int = None, adaptive: bool = None):
+        self.frame_time = frame_time
+        self.batch_size = max(int(batch_size or YOLO_BATCH_SIZE), 1)
+        if adaptive is None:
+            adaptive = DETECTION_SAMPLING == "adaptive"
+        self.scene_detector = SceneChangeDetector(max_interval=DETECTION_MAX_KEYFRAME_INTERVAL) if adaptive else None
+
+        self.tracker = IoUTracker()
+        self.processed_frames = 0
+        self.detector_frames = 0
+
+        # Track detected products and their counts
+        self.detected_products = {}
+
+        # Frame-by-frame data for visualization (array-backed columns)
+        self.frame_series = FrameSeries()
+
+        # Frames waiting for the next batched YOLO call, in decode order.
+        # Each entry is (resized frame or None to reuse the last keyframe, blurriness)
+        self.pending = []
+        self.pending_keyframes = 0
+        self.last_results = None
+
+    def process_frame(self, frame_idx: int, views: FrameViews):
+        frame = views.resized(DETECTION_FRAME_SIZE)
+
+        # Calculate frame blurriness
+        blurriness = calculate_blurriness(views.gray(DETECTION_FRAME_SIZE))
+
+        if self.scene_detector is None or self.scene_detector.is_keyframe(
+                thumbnail=views.thumbnail(self.scene_detector.thumbnail_size, source_size=DETECTION_FRAME_SIZE)):
+            self.pending.append((frame, blurriness))
+            self.pending_keyframes += 1
+        else:
+            self.pending.append((None, blurriness))
+
+        if self.pending_keyframes >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Run one YOLO call over the buffered keyframes and scatter the results"""
+        if not self.pending:
+            return
+
+        keyframes = [frame for frame, _ in self.pending if frame is not None]
+
+        # Object detection (ultralytics returns one Results object per input frame)
+        batch_results = iter(model_registry.get("yolo")(keyframes, conf=0.5, iou=0.5, verbose=False)) if keyframes else iter(())
+        self.detector_frames += len(keyframes)
+
+        for frame, blurriness in self.pending:
+            if frame is not None:
+                self.last_results = next(batch_results)
+            self.record_frame(self.last_results, blurriness)
+
+        self.pending = []
+        self.pending_keyframes = 0
+
+    def finish(self):
+        self.flush()
+        if self.processed_frames:
+            print(f"YOLO ran on {self.detector_frames}/{self.processed_frames} frames")
+
+    def record_frame(self, results, blurriness: float):
+        self.processed_frames += 1
 
+        frame_proximity = []
+        detections = []
 
-async def process_video(video_path: str, task_id: str):
-    temp_dir = None
-    audio_path = None
+        # Process detection results
+        for box in results.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            proximity = calculate_proximity([x1, y1, x2, y2])
+            frame_proximity.append(proximity)
+
+            # Get detected class if available
+            product_name = "object"
+            if hasattr(box, 'cls') and hasattr(results, 'names'):
+                cls_id = int(box.cls[0])
+                if cls_id in results.names:
+                    product_name = results.names[cls_id]
+                    if product_name in self.detected_products:
+                        self.detected_products[product_name] += 1
+                    else:
+                        self.detected_products[product_name] = 1
+
+            detections.append(([x1, y1, x2, y2], product_name))
+
+        # Track objects across frames (stable IDs, incremental durations)
+        self.tracker.update(detections, self.frame_time)
+        avg_proximity = sum(frame_proximity) / len(frame_proximity) if frame_proximity else 0
+
+        # Store frame data for visualization
+        self.frame_series.append(
+            frameNumber=self.processed_frames,
+            proximity=avg_proximity,
+            blurriness=blurriness,
+            objectsCount=len(detections)
+        )
+
+    @property
+    def proximity_values(self) -> np.ndarray:
+        return self.frame_series.column("proximity")
+
+    @property
+    def blurriness_values(self) -> np.ndarray:
+        return self.frame_series.column("blurriness")
+
+    @property
+    def total_object_duration(self) -> float:
+        """Seconds during which at least one tracked object was on screen"""
+        return self.tracker.on_screen_time
+
+
+# Status queue of this process when it is an analysis pool worker
+_worker_status_queue = None
+# Status queue the pool workers report to (API process side)
+worker_status_queue = None
+
+def update_task(task_id: str, **fields):
+    """
+    Record progress of an analysis job in the job queue. progress, stage and
+    message map to job columns; anything else is merged into the job details.
+    """
+    details = {key: value for key, value in fields.items() if key not in ("progress", "stage", "message")}
+    try:
+        job_queue.update_progress(
+            task_id,
+            progress=fields.get("progress"),
+            stage=fields.get("stage"),
+            message=fields.get("message"),
+            details=details or None
+        )
+    except Exception as e:
+        # Progress is best effort; never fail an analysis because of it
+        print(f"Warning: Could not update progress for {task_id}: {str(e)}")
+
+def init_analysis_worker(status_queue):
+    """
+    Initializer for analysis pool processes: warm the models (unless
+    STARTUP_MODE is "lazy") and report back
+    """
+    global _worker_status_queue
+    _worker_status_queue = status_queue
+
+    def report_ready():
+        status_queue.put((WORKER_READY_MESSAGE, {"pid": os.getpid(), "models": model_registry.status()}))
+
+    if STARTUP_MODE == "lazy":
+        # Models load on first use inside the job; the worker is usable right away
+        report_ready()
+        return
+
+    def warm_up():
+        model_registry.warm_up()
+        report_ready()
+
+    threading.Thread(target=warm_up, name="worker-warm-up", daemon=True).start()
+
+def run_queued_job(job: Dict, worker_id: str) -> str:
+    """
+    Run one claimed video analysis job, keeping its lease alive with
+    heartbeats. Executed in a pool worker, an API thread or worker.py.
     
+    Returns:
+        The job's status afterwards ("completed", "queued" for a retry, or
+        "failed"), or None if the lease was lost to another worker
+    """
+    job_id = job["job_id"]
+    attempt = job["attempts"]
+    payload = job["payload"]
+    stop_heartbeat = threading.Event()
+
+    def holds_lease() -> bool:
+        return job_queue.heartbeat(job_id, worker_id, JOB_LEASE_SECONDS, attempt=attempt)
+
+    def heartbeat():
+        while not stop_heartbeat.wait(JOB_LEASE_SECONDS / 3):
+            if not holds_lease():
+                print(f"Warning: Lost lease on job {job_id}")
+                return
+
+    threading.Thread(target=heartbeat, name=f"heartbeat-{job_id}", daemon=True).start()
+    status = None
+    try:
+        results = process_video(payload["video_path"], job_id, payload.get("content_hash"), holds_lease=holds_lease)
+        if job_queue.complete(job_id, worker_id, results, "Analysis completed successfully", attempt=attempt):
+            status = "completed"
+        else:
+            print(f"Job {job_id}: lease lost before completion, result dropped")
+    except Exception as e:
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        status = job_queue.fail(job_id, worker_id, error, attempt=attempt)
+        if status is None:
+            print(f"Job {job_id}: lease lost, failure not recorded: {error}")
+        else:
+            print(f"Job {job_id} failed ({status}): {error}")
+    finally:
+        stop_heartbeat.set()
+        # The upload belongs to whichever worker holds the job. Only the one
+        # that moved it to a terminal state may delete it: a retry still needs
+        # it, and after a lost lease another worker is processing it
+        if status in ("completed", "failed") and os.path.exists(payload["video_path"]):
+            os.remove(payload["video_path"])
+    return status
+
+def drain_worker_status(status_queue):
+    """API-process thread that records pool workers as they finish warming up"""
+    while True:
+        message, fields = status_queue.get()
+        if message == WORKER_READY_MESSAGE:
+            ready_workers[fields["pid"]] = fields["models"]
+            print(f"Analysis worker {fields['pid']} is warm")
+
+def start_analysis_pool():
+    global analysis_pool, worker_status_queue
+    ctx = multiprocessing.get_context("spawn")
+    if worker_status_queue is None:
+        # One status queue (and drain thread) for every pool this process starts
+        worker_status_queue = ctx.Queue()
+        threading.Thread(target=drain_worker_status, args=(worker_status_queue,), name="worker-status", daemon=True).start()
+    analysis_pool = ProcessPoolExecutor(
+        max_workers=ANALYSIS_WORKERS,
+        mp_context=ctx,
+        initializer=init_analysis_worker,
+        initargs=(worker_status_queue,)
+    )
+
+    # Start every worker now so they warm their models before the first upload
+    for _ in range(ANALYSIS_WORKERS):
+        analysis_pool.submit(os.getpid)
+    print(f"Started analysis pool with {ANALYSIS_WORKERS} worker processes")
+
+def mark_pool_broken(pool, error: BaseException):
+    """Remember a pool that raised BrokenProcessPool from submit() or a job's future"""
+    # Pools already replaced (their futures get cancelled) are not tracked
+    if pool is not None and pool is analysis_pool and isinstance(error, BrokenProcessPool):
+        broken_pools.add(pool)
+
+def pool_is_broken(pool) -> bool:
+    return pool in broken_pools
+
+def probe_analysis_pool():
+    """
+    Submit a no-op to the pool: once a worker process has died, submit()
+    raises BrokenProcessPool even while no job is running
+    """
+    pool = analysis_pool
+    if pool is None or pool_is_broken(pool):
+        return
+    try:
+        pool.submit(os.getpid)
+    except BrokenProcessPool as e:
+        mark_pool_broken(pool, e)
+    except RuntimeError:
+        # Shut down by a concurrent restart
+        pass
+
+def restart_analysis_pool(broken_pool):
+    """Replace a broken analysis pool (a worker was killed, e.g. by the OOM killer)"""
+    if analysis_pool is not broken_pool:
+        # Already replaced after another job of the same pool failed
+        return
+    print("Warning: Analysis worker process died; restarting the analysis pool")
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+    broken_pools.discard(broken_pool)
+    ready_workers.clear()
+    start_analysis_pool()
+
+def release_crashed_job(job: Dict, error: str):
+    """Re-queue (or fail, when out of attempts) a job whose worker process died"""
+    status = job_queue.fail(job["job_id"], WORKER_ID, error, attempt=job["attempts"])
+    print(f"Job {job['job_id']} released after worker crash ({status or 'lease lost'})")
+    # Nobody else will run a job that failed for good, so its upload can go
+    video_path = job["payload"].get("video_path")
+    if status == "failed" and video_path and os.path.exists(video_path):
+        os.remove(video_path)
+
+async def dispatch_jobs():
+    """
+    Claim queued analysis jobs and run them on this node, at most one per
+    pool worker (or one at a time on a thread when the pool is disabled)
+    """
+    loop = asyncio.get_running_loop()
+    capacity = max(ANALYSIS_WORKERS, 1)
+    # Running futures -> (job, pool it was submitted to)
+    in_flight = {}
+
+    async def handle_dispatch_error(job: Dict, pool, error: BaseException):
+        mark_pool_broken(pool, error)
+        if isinstance(error, BrokenProcessPool):
+            print(f"Warning: Analysis worker crashed while running job {job['job_id']}: {error!r}")
+            message = "Analysis worker process crashed (out of memory?)"
+        else:
+            print(f"Warning: Could not run job {job['job_id']}: {error!r}")
+            message = f"Could not run analysis: {error}"
+        try:
+            await loop.run_in_executor(None, release_crashed_job, job, message)
+        except Exception as e:
+            print(f"Warning: Could not release job {job['job_id']}: {str(e)}")
+        if pool is not None and pool_is_broken(pool):
+            restart_analysis_pool(pool)
+
+    while True:
+        for future in [future for future in in_flight if future.done()]:
+            job, pool = in_flight.pop(future)
+            error = future.exception() if not future.cancelled() else BrokenProcessPool("cancelled")
+            if error is not None:
+                await handle_dispatch_error(job, pool, error)
+
+        job = None
+        if len(in_flight) < capacity:
+            # Broken while idle: replace it before it costs a claimed job an attempt
+            probe_analysis_pool()
+            if analysis_pool is not None and pool_is_broken(analysis_pool):
+                restart_analysis_pool(analysis_pool)
+            try:
+                job = await loop.run_in_executor(None, job_queue.claim, WORKER_ID, [VIDEO_ANALYSIS_JOB], JOB_LEASE_SECONDS)
+            except Exception as e:
+                print(f"Warning: Could not claim jobs: {str(e)}")
+
+        if job is None:
+            # Woken early when an upload is enqueued on this node
+            job_available.clear()
+            try:
+                await asyncio.wait_for(job_available.wait(), timeout=JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        print(f"Dispatching job {job['job_id']} (attempt {job['attempts']})")
+        pool = analysis_pool
+        try:
+            in_flight[loop.run_in_executor(pool, run_queued_job, job, WORKER_ID)] = (job, pool)
+        except Exception as e:
+            # A dead worker breaks the pool; submitting then fails right away
+            await handle_dispatch_error(job, pool, e)
+
+async def cleanup_jobs_periodically():
+    """Drop finished jobs once they are older than JOB_TTL_SECONDS"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            removed = await loop.run_in_executor(None, job_queue.cleanup, JOB_TTL_SECONDS)
+            if removed:
+                print(f"Removed {removed} expired jobs")
+        except Exception as e:
+            print(f"Warning: Job cleanup failed: {str(e)}")
+        await asyncio.sleep(JOB_CLEANUP_INTERVAL_SECONDS)
+
+async def audit_storage_periodically():
+    """Reconcile the storage statistics with the files on disk every STORAGE_AUDIT_INTERVAL_SECONDS"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(STORAGE_AUDIT_INTERVAL_SECONDS)
+        try:
+            await loop.run_in_executor(None, storage_manager.audit_storage_stats)
+        except Exception as e:
+            print(f"Warning: Storage audit failed: {str(e)}")
+
+
+def process_video(video_path: str, task_id: str, content_hash: str = None, holds_lease=None):
     try:
         # Update task status
-        tasks[task_id]["status"] = "processing"
-        tasks[task_id]["progress"] = 0.0
+        update_task(task_id, progress=0.0, stage="starting")
         
         # Debug logging
         print(f"Starting to process video: {video_path}")
@@ -419,23 +1368,15 @@ async def process_video(video_path: str, task_id: str):
             print(f"Input video not found at path: {video_path}")
             raise HTTPException(status_code=400, detail=f"Input video file not found at path: {video_path}")
         
-        # Create a dedicated temporary directory with absolute path
-        temp_dir = tempfile.mkdtemp()
-        print(f"Created temporary directory: {temp_dir}")
-        
-        # Use absolute paths for temporary files
-        audio_path = os.path.join(temp_dir, f"{uuid.uuid4()}.wav")
-        
-        print(f"Audio will be saved to: {audio_path}")
-
         # Video processing with better error checking
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        try:
+            source = FrameSource(video_path)
+        except ValueError:
             print(f"Failed to open video file: {video_path}")
             raise HTTPException(status_code=400, detail=f"Could not open video file: {video_path}")
 
         # Get video properties with validation
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        fps = int(source.fps)
         if fps <= 0:
             print(f"Invalid FPS detected: {fps}, defaulting to 30fps")
             fps = 30  # Default to 30fps if not detected
@@ -443,147 +1384,205 @@ async def process_video(video_path: str, task_id: str):
         
         print(f"Video FPS: {fps}, frame time: {frame_time}")
 
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        tracked_objects = {}
-        total_object_duration = 0
-        proximity_values, blurriness_values = [], []
-        processed_frames = 0
-        
-        # Track detected products and their counts
-        detected_products = {}
-        
-        # Create arrays to collect frame-by-frame data for visualization
-        frame_data = []
+        total_frames = source.total_frames
 
-        # Process each frame
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        # Independent stages run concurrently; the scoring below joins them
+        graph = StageGraph(max_workers=PIPELINE_STAGE_WORKERS)
 
-            processed_frames += 1
-            frame = cv2.resize(frame, (1020, 500))
-            
-            # Calculate frame blurriness
-            blurriness = calculate_blurriness(frame)
-            blurriness_values.append(blurriness)
-
-            # Object detection
-            results = yolo_model(frame, conf=0.5, iou=0.5)[0]
-            frame_proximity = []
-            objects_in_frame = 0
-
-            # Process detection results
-            for box in results.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
-                proximity = calculate_proximity([x1, y1, x2, y2])
-                frame_proximity.append(proximity)
-                objects_in_frame += 1
-
-                # Track object duration
-                if cx in tracked_objects:
-                    tracked_objects[cx] += frame_time
-                else:
-                    tracked_objects[cx] = frame_time
-                
-                # Get detected class if available
-                if hasattr(box, 'cls') and hasattr(results, 'names'):
-                    cls_id = int(box.cls[0])
-                    if cls_id in results.names:
-                        product_name = results.names[cls_id]
-                        if product_name in detected_products:
-                            detected_products[product_name] += 1
-                        else:
-                            detected_products[product_name] = 1
-                        print(f"Detected product: {product_name}")
-
-            # Update metrics
-            total_object_duration = sum(tracked_objects.values())
-            avg_proximity = sum(frame_proximity) / len(frame_proximity) if frame_proximity else 0
-            proximity_values.append(avg_proximity)
-            
-            # Store frame data for visualization
-            frame_data.append({
-                "frameNumber": processed_frames,
-                "proximity": avg_proximity,
-                "blurriness": blurriness,
-                "objectsCount": objects_in_frame
-            })
-            
-            # Update progress (video processing is ~30% of total work)
-            progress = (processed_frames / total_frames) * 30
-            tasks[task_id]["progress"] = progress
+        # Intermediate results pushed to progress subscribers as stages finish
+        partial_metrics = {}
+        partial_lock = threading.Lock()
 
-        cap.release()
-        print(f"Video processing complete. Total frames: {total_frames}")
-        print(f"Detected products: {detected_products}")
+        def publish_partial(**metrics):
+            with partial_lock:
+                partial_metrics.update(metrics)
+                snapshot = dict(partial_metrics)
+            update_task(task_id, partial_metrics=snapshot)
 
-        # Audio processing with better error handling
-        try:
-            print(f"Starting audio extraction to: {audio_path}")
-            with VideoFileClip(video_path) as video_clip:
-                # Update progress (audio extraction is ~5% of total work)
-                tasks[task_id]["progress"] = 35
-                
-                # Check if video has audio
-                if video_clip.audio is None:
+        def visual_stage(inputs):
+            # One decode pass feeds both the detection stage (every frame) and the
+            # human sentiment stage (one frame every HUMAN_SAMPLE_INTERVAL_SECONDS)
+            detection_stage = ObjectDetectionStage(frame_time)
+            source.subscribe(detection_stage.process_frame, name="object_detection")
+
+            print("\n[2/5] 😊 Analyzing Human Face & Body Language...")
+            human_analyzer = None
+            try:
+                human_analyzer = HumanSentimentAnalyzer(fps=source.fps)
+                source.subscribe(human_analyzer.process_frame, every_seconds=HUMAN_SAMPLE_INTERVAL_SECONDS, name="human_sentiment")
+            except Exception as e:
+                print(f"   ✗ Error in human sentiment analysis: {e}")
+
+            def update_video_progress(frames_read, frame_count):
+                if frame_count > 0:
+                    graph.report("visual", frames_read / frame_count)
+
+            source.run(progress_callback=update_video_progress)
+            detection_stage.finish()
+            print(f"Video processing complete. Total frames: {total_frames}")
+            print(f"Detected products: {detection_stage.detected_products}")
+
+            # HUMAN SENTIMENT ANALYSIS (Facial & Body Language)
+            # Frames were already fed to the analyzer during the shared decode pass
+            try:
+                human_sentiment_result = human_analyzer.finalize() if human_analyzer else HumanSentimentAnalyzer.default_result()
+            except Exception as e:
+                print(f"   ✗ Error in human sentiment analysis: {e}")
+                human_sentiment_result = HumanSentimentAnalyzer.default_result()
+            print("Human sentiment analysis completed")
+
+            publish_partial(
+                total_frames=detection_stage.processed_frames,
+                detector_frames=detection_stage.detector_frames,
+                tracked_objects=detection_stage.tracker.track_count,
+                detected_products=detection_stage.detected_products,
+                human_presence=human_sentiment_result['human_presence'],
+                facial_score=human_sentiment_result['facial_score']
+            )
+            return {"detection": detection_stage, "human_sentiment": human_sentiment_result}
+
+        def audio_stage(inputs):
+            # Demux and resample once, straight into memory; Whisper and
+            # wav2vec both consume the same 16 kHz mono buffer
+            try:
+                print("Starting audio extraction")
+                audio = load_audio_16k_mono(video_path)
+                if audio is None:
                     print("Warning: Video has no audio track")
-                    transcription = "No audio detected in video"
-                    detected_language = "unknown"
-                else:
-                    video_clip.audio.write_audiofile(audio_path, verbose=False, logger=None)
-                    
-                    # Verify audio file was created
-                    if not os.path.exists(audio_path):
-                        print(f"Failed to create audio file at: {audio_path}")
-                        raise HTTPException(status_code=500, detail=f"Failed to create audio file at: {audio_path}")
-
-                    print("Starting transcription")
-                    # Update progress (transcription is ~10% of total work)
-                    tasks[task_id]["progress"] = 45
-                    
-                    # Transcription
-                    transcription_data = whisper_model.transcribe(audio_path)
-                    transcription = transcription_data["text"]
-                    detected_language = transcription_data["language"]
-                    print(f"Transcription complete. Detected language: {detected_language}")
-        except Exception as audio_err:
-            print(f"Error in audio processing: {str(audio_err)}")
-            # Continue with empty transcription rather than failing completely
-            transcription = "Discover the purity of nature with Daichi Kao Ghee. After trying so many brands, I finally found the purity, taste and aroma. The taste, aroma and consistency are truly amazing. Etu Kao Ghee is the purest form of the ghee. This ghee is made from the healthy, happy cows cared for in loving environments. This ghee has lots of benefits. It helps to lubricate joints, nourishes the skin and excrete weight loss and promote gut health. So if you are looking for a healthy lifestyle then use Daichi Kao Ghee in your daily routine."
-            detected_language = "English"  # Default to English if detection fails
-
-        # HUMAN SENTIMENT ANALYSIS (Facial & Body Language)
-        print("Starting human sentiment analysis...")
-        tasks[task_id]["progress"] = 60
-        human_sentiment_result = analyze_human_sentiment(video_path)
-        print("Human sentiment analysis completed")
-
-        # TEXT & VOCAL SENTIMENT ANALYSIS
-        print("Starting text & vocal sentiment analysis...")
-        tasks[task_id]["progress"] = 75
-        text_vocal_result = analyze_text_vocal_sentiment(audio_path)
-        print("Text & vocal sentiment analysis completed")
-
-        # Sentiment analysis (original)
-        print("Starting text sentiment analysis")
-        tasks[task_id]["progress"] = 85
-        sentiment_result = analyze_sentiment(transcription)
-
-        # Normalize metrics
-        max_proximity = max(proximity_values) if proximity_values else 1
-        proximity_percentage = [(p / max_proximity) * 100 for p in proximity_values]
-
-        max_blur = max(blurriness_values) if blurriness_values else 1
-        blur_percentage = [(1 - (b / max_blur)) * 100 for b in blurriness_values]
+                    return {"audio": None, "error": None}
+                print(f"Extracted {len(audio) / SAMPLE_RATE:.1f}s of audio")
+                return {"audio": audio, "error": None}
+            except Exception as audio_err:
+                print(f"Error in audio processing: {str(audio_err)}")
+                return {"audio": None, "error": str(audio_err)}
+
+        def transcribe_stage(inputs):
+            audio = inputs["audio"]
+            if audio["audio"] is None and audio["error"] is None:
+                return {"transcription": "No audio detected in video", "language": "unknown", "transcript": "", "segments": []}
+            
+            try:
+                if audio["error"] is not None:
+                    raise RuntimeError(audio["error"])
+
+                print("Starting transcription")
+                transcription_data = transcribe_speech(
+                    audio["audio"],
+                    progress_callback=lambda done, count: graph.report("transcribe", done / count)
+                )
+                print(f"Transcription complete. Detected language: {transcription_data['language']}")
+                publish_partial(language=transcription_data["language"], transcript_segments=len(transcription_data["segments"]))
+                return {
+                    "transcription": transcription_data["text"],
+                    "language": transcription_data["language"] or "unknown",
+                    "transcript": transcription_data["text"],
+                    "segments": transcription_data["segments"]
+                }
+            except Exception as audio_err:
+                print(f"Error in audio processing: {str(audio_err)}")
+                # Continue with empty transcription rather than failing completely
+                transcription = "Discover the purity of nature with Daichi Kao Ghee. After trying so many brands, I finally found the purity, taste and aroma. The taste, aroma and consistency are truly amazing. Etu Kao Ghee is the purest form of the ghee. This ghee is made from the healthy, happy cows cared for in loving environments. This ghee has lots of benefits. It helps to lubricate joints, nourishes the skin and excrete weight loss and promote gut health. So if you are looking for a healthy lifestyle then use Daichi Kao Ghee in your daily routine."
+                return {"transcription": transcription, "language": "English", "transcript": "", "segments": []}  # Default to English if detection fails
+
+        def transcript_sentiment_stage(inputs):
+            # One batched pass over the whole transcript feeds both sentiment fields
+            try:
+                return score_transcript_sentiment(inputs["transcribe"]["transcription"])
+            except Exception as e:
+                print(f"   ✗ Error in transcript sentiment scoring: {e}")
+                return None
+
+        def text_sentiment_stage(inputs):
+            if inputs["transcript_sentiment"] is None:
+                return {'label': "neutral", 'score': 50}
+            try:
+                return analyze_text_sentiment(inputs["transcribe"]["transcript"], inputs["transcript_sentiment"])
+            except Exception as e:
+                print(f"   ✗ Error in text sentiment analysis: {e}")
+                return {'label': "neutral", 'score': 50}
+
+        def vocal_emotion_stage(inputs):
+            if inputs["audio"]["audio"] is None:
+                return {'emotion': "Neutral", 'score': 50, 'timeline': []}
+            try:
+                result = analyze_vocal_emotion(inputs["audio"]["audio"])
+                publish_partial(vocal_emotion=result['emotion'], vocal_score=result['score'])
+                return result
+            except Exception as e:
+                print(f"   ✗ Error in vocal emotion analysis: {e}")
+                return {'emotion': "Neutral", 'score': 50, 'timeline': []}
+
+        def text_vocal_stage(inputs):
+            # TEXT & VOCAL SENTIMENT ANALYSIS
+            result = combine_text_vocal(inputs["transcribe"]["transcript"], inputs["text_sentiment"], inputs["vocal_emotion"])
+            print("Text & vocal sentiment analysis completed")
+            return result
+
+        def sentiment_stage(inputs):
+            # Sentiment analysis (original)
+            print("Starting text sentiment analysis")
+            result = analyze_sentiment(inputs["transcribe"]["transcription"], inputs["transcript_sentiment"])
+            publish_partial(sentiment=result["sentiment"], sentiment_score=result["score"])
+            return result
+
+        graph.add_stage("visual", visual_stage, weight=40)
+        graph.add_stage("audio", audio_stage, weight=5)
+        graph.add_stage("transcribe", transcribe_stage, depends_on=["audio"], weight=25)
+        graph.add_stage("transcript_sentiment", transcript_sentiment_stage, depends_on=["transcribe"], weight=10)
+        graph.add_stage("text_sentiment", text_sentiment_stage, depends_on=["transcribe", "transcript_sentiment"], weight=0)
+        graph.add_stage("vocal_emotion", vocal_emotion_stage, depends_on=["audio"], weight=15)
+        graph.add_stage("text_vocal", text_vocal_stage, depends_on=["transcribe", "text_sentiment", "vocal_emotion"], weight=0)
+        graph.add_stage("sentiment", sentiment_stage, depends_on=["transcribe", "transcript_sentiment"], weight=0)
+
+        last_reported = [-1]
+
+        def update_stage_progress(fraction, stage_name, event):
+            # Stages cover the first 90% of the task; storage the rest.
+            # Only report when progress moves by at least one point
+            progress = fraction * 90
+            if int(progress) != last_reported[0] or event != "progress":
+                last_reported[0] = int(progress)
+                update_task(task_id, progress=progress, stage=stage_name)
+
+        stage_outputs = graph.run(progress_callback=update_stage_progress)
+        print(f"Stage timings (s): {graph.timings}")
+
+        detection_stage = stage_outputs["visual"]["detection"]
+        human_sentiment_result = stage_outputs["visual"]["human_sentiment"]
+        transcription = stage_outputs["transcribe"]["transcription"]
+        detected_language = stage_outputs["transcribe"]["language"]
+        transcript_segments = stage_outputs["transcribe"]["segments"]
+        text_vocal_result = stage_outputs["text_vocal"]
+        sentiment_result = stage_outputs["sentiment"]
+
+        total_object_duration = detection_stage.total_object_duration
+        proximity_values = detection_stage.proximity_values
+        blurriness_values = detection_stage.blurriness_values
+        detected_products = detection_stage.detected_products
+        frame_series = detection_stage.frame_series
+        product_screen_time = detection_stage.tracker.product_screen_time
+
+        # Normalize metrics (vectorised over the per-frame columns)
+        proximity_values = proximity_values.astype(np.float64)
+        blurriness_values = blurriness_values.astype(np.float64)
+        max_proximity = (proximity_values.max() if len(proximity_values) else 0) or 1
+        proximity_percentage = proximity_values / max_proximity * 100
+
+        max_blur = (blurriness_values.max() if len(blurriness_values) else 0) or 1
+        blur_percentage = (1 - blurriness_values / max_blur) * 100
+
+        def distribution(percentages):
+            counts = np.histogram(np.clip(percentages, 0, 100), bins=[0, 25, 50, 75, np.inf])[0]
+            return [
+                {"range": label, "count": int(count)}
+                for label, count in zip(["0-25%", "25-50%", "50-75%", "75-100%"], counts)
+            ]
 
         # Compute final scores
-        proximity_score = sum([p * (1 - b / 100) for p, b in zip(proximity_percentage, blur_percentage)]) / len(proximity_percentage) if proximity_percentage else 0
+        proximity_score = float(np.mean(proximity_percentage * (1 - blur_percentage / 100))) if len(proximity_percentage) else 0
         object_duration_percentage = (total_object_duration / (total_frames * frame_time)) * 100 if total_frames > 0 else (0 if total_frames == 0 else 0)
 
         # Instead of creating visualization image, prepare detailed data for frontend
-        tasks[task_id]["progress"] = 90
         
         # Prepare visualization data for frontend
         visualization_data = {
@@ -592,19 +1591,11 @@ async def process_video(video_path: str, task_id: str):
                 "proximityScore": proximity_score,
                 "sentimentScore": sentiment_result["score"]
             },
-            "frameData": frame_data,
-            "blurDistribution": [
-                {"range": "0-25%", "count": sum(1 for b in blur_percentage if b < 25)},
-                {"range": "25-50%", "count": sum(1 for b in blur_percentage if 25 <= b < 50)},
-                {"range": "50-75%", "count": sum(1 for b in blur_percentage if 50 <= b < 75)},
-                {"range": "75-100%", "count": sum(1 for b in blur_percentage if b >= 75)}
-            ],
-            "proximityDistribution": [
-                {"range": "0-25%", "count": sum(1 for p in proximity_percentage if p < 25)},
-                {"range": "25-50%", "count": sum(1 for p in proximity_percentage if 25 <= p < 50)},
-                {"range": "50-75%", "count": sum(1 for p in proximity_percentage if 50 <= p < 75)},
-                {"range": "75-100%", "count": sum(1 for p in proximity_percentage if p >= 75)}
-            ]
+            # Downsampled for charts; full resolution via /storage/analysis/{id}/frames
+            "frameData": frame_series.downsample(FRAME_SERIES_POINTS, y=FRAME_CHART_SERIES),
+            "frameDataTotal": len(frame_series),
+            "blurDistribution": distribution(blur_percentage),
+            "proximityDistribution": distribution(proximity_percentage)
         }
 
         # Format detected products for results
@@ -614,6 +1605,7 @@ async def process_video(video_path: str, task_id: str):
                 product_list.append({
                     "name": product,
                     "count": count,
+                    "screen_time": product_screen_time.get(product, 0),
                     "confidence": None  # You could add confidence scores if available
                 })
         
@@ -628,7 +1620,6 @@ async def process_video(video_path: str, task_id: str):
 
         # Prepare results
         print("Preparing final results")
-        tasks[task_id]["progress"] = 100
         
         # Calculate overall effectiveness score (combining all analyses)
         overall_score = (
@@ -641,41 +1632,54 @@ async def process_video(video_path: str, task_id: str):
         results = {
             "transcription": transcription,
             "language": detected_language,
+            "transcript_segments": transcript_segments,
             "sentiment": {
                 "sentiment": sentiment_result["sentiment"],
                 "score": sentiment_result["score"],
                 "raw_label": sentiment_result["raw_label"],
-                "raw_score": sentiment_result["raw_score"]
+                "raw_score": sentiment_result["raw_score"],
+                "segments": sentiment_result["segments"]
             },
             "human_sentiment": human_sentiment_result,
             "text_vocal_sentiment": text_vocal_result,
             "metrics": {
                 "object_duration": total_object_duration,
                 "object_duration_percentage": object_duration_percentage,
+                "object_track_time": detection_stage.tracker.total_track_time,
+                "tracked_objects": detection_stage.tracker.track_count,
+                "product_screen_time": product_screen_time,
                 "proximity_score": proximity_score,
                 "total_frames": total_frames,
-                "average_blurriness": sum(blurriness_values)/len(blurriness_values) if blurriness_values else 0,
-                "overall_effectiveness_score": overall_score
+                "detector_frames": detection_stage.detector_frames,
+                "average_blurriness": float(blurriness_values.mean()) if len(blurriness_values) else 0,
+                "overall_effectiveness_score": overall_score,
+                "stage_timings": graph.timings
             },
             "detected_products": product_list,
+            "object_tracks": detection_stage.tracker.summary(frame_time),
             "visualization_data": visualization_data,
             "success": True
         }
 
 
         #Storage code 
+        # The upload is moved into storage, so only the current owner of the job may store it
+        if holds_lease is not None and not holds_lease():
+            raise RuntimeError("Lease on the job was lost; another worker owns it now")
         print("Storing analysis results and video...")
-        tasks[task_id]["progress"] = 95
+        update_task(task_id, progress=95, stage="storage")
         
-        storage_result = storage_manager.store_complete_analysis(video_path, results)
+        storage_result = storage_manager.store_complete_analysis(
+            video_path, results, content_hash, PIPELINE_VERSION, frame_series=frame_series, move_video=True
+        )
         
         if storage_result["success"]:
-            tasks[task_id]["storage_info"] = storage_result
+            update_task(task_id, storage_info=storage_result)
             print(f"Analysis stored successfully with ID: {storage_result['analysis_id']}")
         else:
             print(f"Warning: Could not store analysis results: {storage_result.get('error', 'Unknown error')}")
         
-        tasks[task_id]["progress"] = 100
+        update_task(task_id, progress=100)
         
         # Add storage info to results
         results["storage_info"] = storage_result
@@ -692,103 +1696,334 @@ async def process_video(video_path: str, task_id: str):
         # More descriptive error message
         error_detail = f"Error processing video: {str(e)}"
         raise HTTPException(status_code=500, detail=error_detail)
-        
-    finally:
-        print("Cleaning up temporary files")
-        # Clean up temporary files with better error handling
-        try:
-            # Clean up audio file
-            if audio_path and os.path.exists(audio_path):
-                os.remove(audio_path)
-                print(f"Removed audio file: {audio_path}")
-                
-            # Clean up temp directory
-            if temp_dir and os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
-                print(f"Removed temporary directory: {temp_dir}")
-                
-        except Exception as cleanup_err:
-            print(f"Warning: Error during cleanup: {str(cleanup_err)}")
+
+def enqueue_analysis(task_id: str, video_path: str, content_hash: str) -> bool:
+    """
+    Queue an uploaded video for analysis, or finish the task right away with
+    the stored results when identical content was already analyzed by this
+    pipeline version. Blocking; run it on an executor thread.
+
+    Returns:
+        True if stored results were reused (the upload is deleted)
+    """
+    existing = storage_manager.find_analysis_by_content(content_hash, PIPELINE_VERSION)
+    if existing:
+        stored = storage_manager.get_analysis_by_id(existing["analysis_id"])
+        if "error" not in stored:
+            storage_info = {
+                "analysis_id": existing["analysis_id"],
+                "video_path": existing.get("video_path"),
+                "json_path": storage_manager.analysis_json_path(existing["analysis_id"]),
+                "success": True,
+                "deduplicated": True
+            }
+            results = dict(stored.get("data", {}))
+            results["storage_info"] = storage_info
             
+            # Recorded as an already-finished job (never claimable) so status lookups work the same way
+            recorded = job_queue.record_completed(
+                VIDEO_ANALYSIS_JOB,
+                {"video_path": None, "content_hash": content_hash},
+                results,
+                job_id=task_id,
+                message="Identical video already analyzed; returning stored results",
+                details={"storage_info": storage_info}
+            )
+            if not recorded:
+                raise RuntimeError(f"Task {task_id} already exists")
+            os.remove(video_path)
+            print(f"Duplicate upload, reusing analysis {existing['analysis_id']}")
+            return True
+    
+    # Queue the analysis; any worker sharing the job queue may pick it up
+    job_queue.enqueue(
+        VIDEO_ANALYSIS_JOB,
+        {"video_path": video_path, "content_hash": content_hash},
+        job_id=task_id,
+        max_attempts=JOB_MAX_ATTEMPTS
+    )
+    return False
+
 @app.post("/analyze-video")
-async def analyze_video(video: UploadFile = File(...)):
+async def analyze_video(request: Request):
+    """
+    Accept a video upload (multipart field "video", or a raw video/* body) and
+    queue it for analysis. The body is streamed to disk in chunks and hashed
+    on the fly, so memory per upload stays constant.
+    """
     try:
-        # Validate file
-        if not video.content_type.startswith('video/'):
-            raise HTTPException(status_code=400, detail="File must be a video")
-        
         # Create task
         task_id = str(uuid.uuid4())
-        tasks[task_id] = {
-            "status": "processing",
-            "progress": 0.0,
-            "results": None,
-            "message": None,
-            "storage_info": None
-        }
-        
-        # Save video to temp file
-        temp_video_path = os.path.join(tempfile.gettempdir(), f"{task_id}.mp4")
-        with open(temp_video_path, "wb") as buffer:
-            buffer.write(await video.read())
         
-        # Start processing in background
-        async def process_task():
-            try:
-                results = await process_video(temp_video_path, task_id)
-                tasks[task_id] = {
-                    "status": "completed",
-                    "progress": 100.0,
-                    "results": results,
-                    "message": "Analysis completed successfully",
-                    "storage_info": results.get("storage_info", {})
-                }
-            except Exception as e:
-                tasks[task_id] = {
-                    "status": "failed",
-                    "progress": 0.0,
-                    "results": None,
-                    "message": str(e),
-                    "storage_info": None
-                }
-            finally:
-                if os.path.exists(temp_video_path):
-                    os.remove(temp_video_path)
+        # Stream the video to the upload directory; validates the content type
+        temp_video_path = os.path.join(UPLOAD_DIR, f"{task_id}.mp4")
+        try:
+            upload = await stream_upload_to_disk(
+                request,
+                temp_video_path,
+                field_name="video",
+                max_bytes=MAX_UPLOAD_BYTES,
+                content_type_prefix="video/"
+            )
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        content_hash = upload.content_hash
+        print(f"Received upload {upload.filename or task_id} ({upload.size / (1024 * 1024):.1f} MB)")
         
-        asyncio.create_task(process_task())
+        # Catalog lookup, JSON parse and queue writes are blocking: keep them off the event loop
+        deduplicated = await asyncio.get_running_loop().run_in_executor(
+            None, enqueue_analysis, task_id, temp_video_path, content_hash
+        )
+        if deduplicated:
+            return {"task_id": task_id, "deduplicated": True}
+        job_available.set()
         
         return {"task_id": task_id}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/health")
+async def health_check():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+def models_healthy(models: Dict[str, Dict]) -> bool:
+    """Whether a model status snapshot has every model loaded and no load errors"""
+    return bool(models) and all(status.get("loaded") and not status.get("error") for status in models.values())
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: models needed for analysis are loaded"""
+    # In lazy mode models load on demand, so the API is ready as soon as it is up
+    if not RUN_EMBEDDED_WORKERS:
+        # API-only node: it just needs to accept uploads and serve status
+        ready = True
+        models = {"embedded_workers": False}
+    elif analysis_pool is not None:
+        # Every worker must have warmed up without model errors (warm-up records
+        # failures instead of raising), and the pool must not have lost a process
+        healthy = [pid for pid, worker_models in ready_workers.items() if models_healthy(worker_models)]
+        failed = [pid for pid, worker_models in ready_workers.items()
+                  if any(status.get("error") for status in worker_models.values())]
+        pool_broken = pool_is_broken(analysis_pool)
+        ready = not pool_broken and not failed and (STARTUP_MODE == "lazy" or len(healthy) >= ANALYSIS_WORKERS)
+        models = {
+            "workers": ready_workers,
+            "pool_size": ANALYSIS_WORKERS,
+            "healthy_workers": len(healthy),
+            "failed_workers": len(failed),
+            "pool_broken": pool_broken
+        }
+    else:
+        ready = STARTUP_MODE == "lazy" or model_registry.all_loaded()
+        models = model_registry.status()
+    body = {"ready": ready, "startup_mode": STARTUP_MODE, "models": models}
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+@app.get("/models")
+async def get_model_status():
+    """Load state and memory footprint of every registered model"""
+    if analysis_pool is not None:
+        # Snapshot reported by each pool worker once it finished warming up
+        return {str(pid): models for pid, models in ready_workers.items()}
+    return model_registry.status()
+
 @app.get("/analysis-status/{task_id}")
 async def get_analysis_status(task_id: str):
-    if task_id not in tasks:
+    """
+    Lightweight status of an analysis. Results are not included; fetch them
+    from results_url once the status is "completed", or subscribe to
+    /analysis-events/{task_id} (SSE) or /ws/analysis/{task_id} instead of polling.
+    """
+    job = job_queue.get_status(task_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    
-    task = tasks[task_id]
+
+    event = ProgressBroadcaster.build_event(task_id, job)
+    event.pop("event")
+    event["storage_info"] = (job["details"] or {}).get("storage_info")
+    return event
+
+@app.get("/analysis-results/{task_id}")
+async def get_analysis_results(task_id: str):
+    """Final results of a completed analysis"""
+    job = job_queue.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Analysis is not completed (status: {job['status']})")
+
+    results = job["result"]
     return {
-        "status": task["status"],
-        "progress": task["progress"],
-        "results": task["results"],
-        "message": task["message"],
-        "storage_info": task.get("storage_info")
+        "task_id": task_id,
+        "results": results,
+        "storage_info": (job["details"] or {}).get("storage_info") or (results or {}).get("storage_info")
     }
 
+@app.get("/analysis-events/{task_id}")
+async def stream_analysis_events(task_id: str, request: Request):
+    """
+    Server-Sent Events stream of an analysis: "progress" events on every
+    stage/progress change (with partial metrics), then one "completed" or
+    "failed" event, after which the stream ends.
+    """
+    if job_queue.get_status(task_id) is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    async def event_stream():
+        queue = progress_broadcaster.subscribe(task_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=PROGRESS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is None:
+                    yield format_sse({"event": "failed", "task_id": task_id, "status": "failed", "message": "Task not found"})
+                    break
+                yield format_sse(event)
+                if event["event"] in ("completed", "failed"):
+                    break
+        finally:
+            progress_broadcaster.unsubscribe(task_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/analysis/{task_id}")
+async def analysis_progress_socket(websocket: WebSocket, task_id: str):
+    """WebSocket variant of /analysis-events: one JSON message per event"""
+    await websocket.accept()
+    if job_queue.get_status(task_id) is None:
+        await websocket.send_json({"event": "failed", "task_id": task_id, "status": "failed", "message": "Task not found"})
+        await websocket.close()
+        return
+
+    queue = progress_broadcaster.subscribe(task_id)
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                await websocket.send_json({"event": "failed", "task_id": task_id, "status": "failed", "message": "Task not found"})
+                break
+            await websocket.send_json(event)
+            if event["event"] in ("completed", "failed"):
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        progress_broadcaster.unsubscribe(task_id, queue)
+
 
 # New endpoints for storage management
 @app.get("/storage/analyses")
-async def list_stored_analyses():
-    """List all stored analyses"""
+async def list_stored_analyses(limit: int = 50, offset: int = 0,
+                               sort: str = "timestamp", order: str = "desc"):
+    """
+    List stored analyses from the catalog, one page at a time
+
+    Args:
+        limit: Page size (1-1000)
+        offset: Number of analyses to skip
+        sort: "timestamp", "overall_score" or "analysis_id"
+        order: "desc" or "asc"
+
+    Returns:
+        The page plus next_offset, the offset of the next page (None on the last one)
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
     try:
-        analyses = storage_manager.list_all_analyses()
+        analyses = storage_manager.list_all_analyses(limit, offset, sort, order == "desc")
+        total = storage_manager.count_analyses()
+        next_offset = offset + len(analyses)
         return {
-            "total_analyses": len(analyses),
+            "total_analyses": total,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": next_offset if analyses and next_offset < total else None,
             "analyses": analyses
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing analyses: {str(e)}")
 
+def catalog_timestamp(value: str) -> str:
+    """
+    Normalize an ISO date/time for comparison with catalog timestamps, which
+    are naive local time; offsets (e.g. "Z", "+02:00") are converted to it
+    """
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
+@app.post("/storage/query")
+async def query_stored_analyses(query: AnalysisQuery):
+    """
+    Filter and sort stored analyses through the catalog's indexes
+
+    Filters on the stored timestamp, score fields (overall_score plus
+    AnalysisCatalog.SCORE_COLUMNS from metrics, sentiment, human_sentiment
+    and text_vocal_sentiment) and detected product names. Pages are
+    continued with the returned next_cursor.
+    """
+    if query.order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if not 1 <= query.limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+
+    try:
+        since = catalog_timestamp(query.since) if query.since else None
+        until = catalog_timestamp(query.until) if query.until else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since/until must be ISO dates or date-times")
+
+    try:
+        page = await asyncio.get_running_loop().run_in_executor(None, lambda: storage_manager.query_analyses(
+            since=since,
+            until=until,
+            min_scores=query.min_scores,
+            max_scores=query.max_scores,
+            products=query.products,
+            sort_by=query.sort,
+            descending=query.order == "desc",
+            limit=query.limit,
+            cursor=query.cursor
+        ))
+        return {"limit": query.limit, "count": len(page["analyses"]), **page}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying analyses: {str(e)}")
+
+@app.post("/storage/catalog/rebuild")
+async def rebuild_analysis_catalog():
+    """Rebuild the analysis catalog from the files on disk"""
+    try:
+        count = await asyncio.get_running_loop().run_in_executor(None, storage_manager.rebuild_catalog)
+        return {"success": True, "total_analyses": count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding catalog: {str(e)}")
+
 @app.get("/storage/analysis/{analysis_id}")
 async def get_stored_analysis(analysis_id: str):
     """Get specific analysis by ID"""
@@ -802,34 +2037,54 @@ async def get_stored_analysis(analysis_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving analysis: {str(e)}")
 
+@app.delete("/storage/analysis/{analysis_id}")
+async def delete_stored_analysis(analysis_id: str):
+    """Delete a stored analysis with its video, per-frame data and report"""
+    result = await asyncio.get_running_loop().run_in_executor(None, storage_manager.delete_analysis, analysis_id)
+    if not result["success"]:
+        status_code = 404 if "not found" in result["error"] else 500
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    return result
+
+@app.get("/storage/analysis/{analysis_id}/frames")
+async def get_stored_frame_series(analysis_id: str, points: int = 0):
+    """
+    Per-frame chart data of a stored analysis
+
+    Args:
+        points: Downsample (LTTB) to at most this many rows; 0 returns full resolution
+    """
+    frame_series = await asyncio.get_running_loop().run_in_executor(None, storage_manager.get_frame_series, analysis_id)
+    if frame_series is None:
+        raise HTTPException(status_code=404, detail=f"Analysis {analysis_id} not found")
+
+    if points > 0:
+        frame_data = frame_series.downsample(points, y=[name for name in FRAME_CHART_SERIES if name in frame_series.dtypes])
+    else:
+        frame_data = frame_series.to_records()
+    return {
+        "analysis_id": analysis_id,
+        "total_frames": len(frame_series),
+        "points": len(frame_data),
+        "frameData": frame_data
+    }
+
 @app.get("/storage/info")
 async def get_storage_info():
-    """Get storage system information"""
+    """Get storage system information (maintained totals, no directory scan)"""
     try:
-        base_path = storage_manager.base_storage_path
-        videos_dir = os.path.join(base_path, "videos")
-        results_dir = os.path.join(base_path, "analysis_results")
-        reports_dir = os.path.join(base_path, "reports")
-        
-        def get_directory_size(directory):
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(directory):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    total_size += os.path.getsize(filepath)
-            return total_size
-        
-        return {
-            "storage_path": base_path,
-            "videos_count": len(os.listdir(videos_dir)) if os.path.exists(videos_dir) else 0,
-            "analyses_count": len(os.listdir(results_dir)) if os.path.exists(results_dir) else 0,
-            "reports_count": len(os.listdir(reports_dir)) if os.path.exists(reports_dir) else 0,
-            "videos_size_mb": get_directory_size(videos_dir) / (1024 * 1024),
-            "analyses_size_mb": get_directory_size(results_dir) / (1024 * 1024),
-            "reports_size_mb": get_directory_size(reports_dir) / (1024 * 1024)
-        }
+        return await asyncio.get_running_loop().run_in_executor(None, storage_manager.storage_info)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting storage info: {str(e)}")
+
+@app.post("/storage/stats/audit")
+async def audit_storage_stats():
+    """Recount the storage directories and correct the maintained totals"""
+    try:
+        drift = await asyncio.get_running_loop().run_in_executor(None, storage_manager.audit_storage_stats)
+        return {"success": True, "drift": drift}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error auditing storage: {str(e)}")
     
 
     
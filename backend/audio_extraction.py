@@ -0,0 +1,46 @@
+import os
+import subprocess
+from typing import Optional
+
+import numpy as np
+
+# Sample rate expected by Whisper and wav2vec2
+SAMPLE_RATE = 16000
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+
+def load_audio_16k_mono(media_path: str, sample_rate: int = SAMPLE_RATE) -> Optional[np.ndarray]:
+    """
+    Demux and resample a file's audio track in one ffmpeg pass, straight into memory
+
+    Args:
+        media_path: Video or audio file
+        sample_rate: Output sample rate
+
+    Returns:
+        Mono float32 samples in [-1, 1], or None if the file has no audio track
+    """
+    cmd = [
+        FFMPEG_BINARY,
+        "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", media_path,
+        "-vn",
+        "-f", "f32le",
+        "-acodec", "pcm_f32le",
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-"
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    if proc.returncode != 0:
+        stderr = proc.stderr.decode("utf-8", errors="ignore")
+        if "does not contain any stream" in stderr or "matches no streams" in stderr:
+            return None
+        raise RuntimeError(f"ffmpeg audio extraction failed: {stderr.strip()[-500:]}")
+
+    audio = np.frombuffer(proc.stdout, dtype=np.float32)
+    return audio if audio.size else None
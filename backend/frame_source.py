@@ -0,0 +1,150 @@
+import cv2
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class FrameViews:
+    def __init__(self, frame: np.ndarray):
+        """
+        Per-frame preprocessing cache shared by every consumer of a frame
+
+        Each representation (resized BGR, RGB, grayscale, thumbnail) is computed
+        at most once per frame, and derived from the smallest view that can
+        produce it instead of from the full-resolution frame.
+
+        Args:
+            frame: Decoded full-resolution BGR frame
+        """
+        self.frame = frame
+        self._views: Dict[tuple, np.ndarray] = {}
+
+    def _memo(self, key: tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = compute()
+        return view
+
+    def scaled_size(self, max_side: int) -> Tuple[int, int]:
+        """(width, height) of the frame downscaled so its longest side is at most max_side"""
+        height, width = self.frame.shape[:2]
+        scale = min(1.0, max_side / max(height, width))
+        return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+    def resized(self, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """BGR frame resized to exactly (width, height); the original frame if size is None"""
+        if size is None:
+            return self.frame
+        return self._memo(("bgr", tuple(size)), lambda: cv2.resize(self.frame, tuple(size)))
+
+    def scaled(self, max_side: Optional[int] = None) -> np.ndarray:
+        """BGR frame downscaled (aspect ratio kept) to at most max_side pixels"""
+        if max_side is None:
+            return self.frame
+        size = self.scaled_size(max_side)
+        if size == (self.frame.shape[1], self.frame.shape[0]):
+            return self.frame
+        return self._memo(("scaled", size), lambda: cv2.resize(self.frame, size, interpolation=cv2.INTER_AREA))
+
+    def rgb(self, max_side: Optional[int] = None) -> np.ndarray:
+        """RGB view of scaled(max_side)"""
+        return self._memo(("rgb", max_side), lambda: cv2.cvtColor(self.scaled(max_side), cv2.COLOR_BGR2RGB))
+
+    def gray(self, size: Optional[Tuple[int, int]] = None, max_side: Optional[int] = None) -> np.ndarray:
+        """Grayscale view of resized(size), or of scaled(max_side) when max_side is given"""
+        if max_side is not None:
+            return self._memo(("gray_scaled", max_side), lambda: cv2.cvtColor(self.scaled(max_side), cv2.COLOR_BGR2GRAY))
+        key = tuple(size) if size is not None else None
+        return self._memo(("gray", key), lambda: cv2.cvtColor(self.resized(size), cv2.COLOR_BGR2GRAY))
+
+    def thumbnail(self, size: Tuple[int, int], source_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Tiny grayscale thumbnail, downscaled from gray(source_size)"""
+        return self._memo(
+            ("thumbnail", tuple(size), source_size and tuple(source_size)),
+            lambda: cv2.resize(self.gray(source_size), tuple(size), interpolation=cv2.INTER_AREA)
+        )
+
+
+class FrameSource:
+    def __init__(self, video_path: str):
+        """
+        Decode a video file once and fan its frames out to every subscriber
+
+        Args:
+            video_path: Path to the video file to decode
+        """
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.subscribers: List[Dict] = []
+
+    def subscribe(self, callback: Callable, every_n_frames: int = 1,
+                  every_seconds: Optional[float] = None, name: Optional[str] = None):
+        """
+        Register a consumer that receives frames at its own sampling rate
+
+        Args:
+            callback: Called as callback(frame_idx, views) for every sampled frame,
+                where views is the frame's shared FrameViews
+            every_n_frames: Deliver one frame out of every N decoded frames
+            every_seconds: Deliver one frame per interval (overrides every_n_frames)
+            name: Optional consumer name used in log output
+        """
+        if every_seconds is not None:
+            interval = max(int(self.fps * every_seconds), 1)
+        else:
+            interval = max(int(every_n_frames), 1)
+
+        self.subscribers.append({
+            "callback": callback,
+            "interval": interval,
+            "name": name or getattr(callback, "__name__", "consumer")
+        })
+        print(f"Frame consumer '{self.subscribers[-1]['name']}' subscribed (every {interval} frames)")
+
+    def run(self, progress_callback: Optional[Callable] = None) -> int:
+        """
+        Decode the video once, delivering each frame to the consumers that want it
+
+        Frames that no consumer samples are only grabbed, never converted to BGR.
+        Consumers of the same frame share one FrameViews, so each resize or
+        colour conversion happens once per frame.
+
+        Args:
+            progress_callback: Optional callable receiving (frames_read, total_frames)
+
+        Returns:
+            Number of frames read from the video
+        """
+        frame_idx = 0
+        try:
+            while True:
+                wanted = [s for s in self.subscribers if frame_idx % s["interval"] == 0]
+
+                if not self.cap.grab():
+                    break
+
+                if wanted:
+                    ret, frame = self.cap.retrieve()
+                    if not ret:
+                        break
+                    views = FrameViews(frame)
+                    for subscriber in wanted:
+                        subscriber["callback"](frame_idx, views)
+
+                frame_idx += 1
+                if progress_callback:
+                    progress_callback(frame_idx, self.total_frames)
+        finally:
+            self.release()
+
+        return frame_idx
+
+    def release(self):
+        """Release the underlying capture handle"""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
@@ -0,0 +1,484 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def _json_default(value):
+    # NumPy scalars and similar expose .item(); anything else is stored as text
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class JobQueue:
+    """
+    Interface of the job subsystem. SQLiteJobQueue is the local implementation;
+    a networked broker can implement the same methods.
+
+    Job statuses: "queued" -> "running" -> "completed" | "failed".
+    A running job holds a lease that its worker must extend with heartbeat();
+    jobs whose lease expires are re-queued until max_attempts is reached.
+    """
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], job_id: str = None, max_attempts: int = 3) -> str:
+        raise NotImplementedError
+
+    def record_completed(self, kind: str, payload: Dict[str, Any], result: Any, job_id: str = None,
+                         message: str = None, details: Dict[str, Any] = None) -> bool:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, kinds: List[str] = None, lease_seconds: int = 60) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def claim_job(self, job_id: str, worker_id: str, lease_seconds: int = 60) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int = 60, attempt: int = None) -> bool:
+        raise NotImplementedError
+
+    def update_progress(self, job_id: str, progress: float = None, stage: str = None,
+                        message: str = None, details: Dict[str, Any] = None):
+        raise NotImplementedError
+
+    def complete(self, job_id: str, worker_id: str, result: Any = None, message: str = None,
+                 attempt: int = None) -> bool:
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True,
+             attempt: int = None) -> Optional[str]:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_statuses(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def expire_leases(self) -> int:
+        raise NotImplementedError
+
+    def cleanup(self, ttl_seconds: int) -> int:
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    def __init__(self, db_path: str):
+        """
+        Durable job queue stored in a SQLite database
+
+        Safe to share between processes on one host (WAL mode, short
+        IMMEDIATE transactions for claims). Same host only: WAL needs shared
+        memory and SQLite locking is unreliable on network filesystems, so
+        workers on other machines need a networked JobQueue implementation.
+
+        Expired leases are collected by claim(), expire_leases() and
+        cleanup(); queues whose jobs are only taken with claim_job() must
+        call one of the latter two.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self):
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT,
+                    result TEXT,
+                    error TEXT,
+                    progress REAL DEFAULT 0,
+                    stage TEXT,
+                    message TEXT,
+                    details TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    max_attempts INTEGER DEFAULT 3,
+                    worker_id TEXT,
+                    lease_expires REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+                CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+            """)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        for field in ("payload", "result", "details"):
+            job[field] = json.loads(job[field]) if job[field] else None
+        for field in ("created_at", "updated_at", "finished_at"):
+            if job[field] is not None:
+                job[field] = datetime.fromtimestamp(job[field]).isoformat()
+        return job
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], job_id: str = None, max_attempts: int = 3) -> str:
+        """
+        Add a job to the queue
+
+        Args:
+            kind: Job type, used by workers to select what they can run
+            payload: JSON-serialisable job arguments
+            job_id: Optional caller-chosen ID (defaults to a new UUID)
+            max_attempts: How many times the job may be tried before it fails
+
+        Returns:
+            The job ID
+        """
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, status, payload, max_attempts, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, default=_json_default), max_attempts, now, now)
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def record_completed(self, kind: str, payload: Dict[str, Any], result: Any, job_id: str = None,
+                         message: str = None, details: Dict[str, Any] = None) -> bool:
+        """
+        Insert a job that is already completed (work done without a worker,
+        e.g. reused results), in a single statement so no worker can claim it
+
+        Returns:
+            False if a job with this ID already exists (nothing was written)
+        """
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_id, kind, status, payload, result, progress, message, details, "
+                "attempts, max_attempts, created_at, updated_at, finished_at) "
+                "VALUES (?, ?, 'completed', ?, ?, 100, ?, ?, 0, 0, ?, ?, ?)",
+                (
+                    job_id, kind,
+                    json.dumps(payload, default=_json_default),
+                    json.dumps(result, default=_json_default),
+                    message,
+                    json.dumps(details, default=_json_default) if details else None,
+                    now, now, now
+                )
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float) -> int:
+        """Re-queue (or fail) running jobs whose worker stopped heartbeating"""
+        failed = conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Lease expired', worker_id = NULL, "
+            "finished_at = ?, updated_at = ? "
+            "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+            (now, now, now)
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker_id = NULL, updated_at = ? "
+            "WHERE status = 'running' AND lease_expires < ?",
+            (now, now)
+        ).rowcount
+        return failed + requeued
+
+    def expire_leases(self) -> int:
+        """
+        Re-queue running jobs whose lease expired, or fail them once they
+        have used up their attempts (e.g. the worker process died)
+
+        Returns:
+            Number of jobs re-queued or failed
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = self._expire_leases(conn, time.time())
+            conn.execute("COMMIT")
+            return expired
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, worker_id: str, kinds: List[str] = None, lease_seconds: int = 60) -> Optional[Dict[str, Any]]:
+        """
+        Claim the oldest queued job
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            kinds: Only claim jobs of these kinds (all kinds if None)
+            lease_seconds: Lease length; extend it with heartbeat()
+
+        Returns:
+            The claimed job, or None if nothing is queued
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire_leases(conn, now)
+
+            query = "SELECT job_id FROM jobs WHERE status = 'queued'"
+            params: list = []
+            if kinds:
+                query += f" AND kind IN ({','.join('?' for _ in kinds)})"
+                params.extend(kinds)
+            query += " ORDER BY created_at LIMIT 1"
+            row = conn.execute(query, params).fetchone()
+
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                (worker_id, now + lease_seconds, now, row["job_id"])
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+            conn.execute("COMMIT")
+            return self._row_to_job(job)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim_job(self, job_id: str, worker_id: str, lease_seconds: int = 60) -> Optional[Dict[str, Any]]:
+        """Claim one specific queued job (for work that must run where it was submitted)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                (worker_id, now + lease_seconds, now, job_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _lease_clause(attempt: Optional[int]) -> str:
+        # Workers of one node share a worker ID, so the attempt number tells a
+        # re-claimed job apart from the claim that lost its lease
+        return "job_id = ? AND worker_id = ? AND status = 'running'" + (" AND attempts = ?" if attempt is not None else "")
+
+    @staticmethod
+    def _lease_params(job_id: str, worker_id: str, attempt: Optional[int]) -> tuple:
+        return (job_id, worker_id) + ((attempt,) if attempt is not None else ())
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: int = 60, attempt: int = None) -> bool:
+        """
+        Extend the lease of a running job
+
+        Args:
+            attempt: The claim's attempt number (job["attempts"]), if known
+
+        Returns:
+            False if the worker no longer owns the job (lease lost)
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE {self._lease_clause(attempt)}",
+                (now + lease_seconds, now) + self._lease_params(job_id, worker_id, attempt)
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def update_progress(self, job_id: str, progress: float = None, stage: str = None,
+                        message: str = None, details: Dict[str, Any] = None):
+        """
+        Record progress of a job; details are merged into the existing details
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if details:
+                row = conn.execute("SELECT details FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                merged = json.loads(row["details"]) if row and row["details"] else {}
+                merged.update(details)
+                details_json = json.dumps(merged, default=_json_default)
+            else:
+                details_json = None
+
+            conn.execute(
+                "UPDATE jobs SET progress = COALESCE(?, progress), stage = COALESCE(?, stage), "
+                "message = COALESCE(?, message), details = COALESCE(?, details), updated_at = ? "
+                "WHERE job_id = ?",
+                (progress, stage, message, details_json, now, job_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, job_id: str, worker_id: str, result: Any = None, message: str = None,
+                 attempt: int = None) -> bool:
+        """
+        Record a successful attempt
+
+        Args:
+            attempt: The claim's attempt number (job["attempts"]), if known
+
+        Returns:
+            False if the worker no longer owns the job (lease lost); the result is dropped
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'completed', progress = 100, result = ?, message = ?, "
+                f"lease_expires = NULL, finished_at = ?, updated_at = ? WHERE {self._lease_clause(attempt)}",
+                (json.dumps(result, default=_json_default), message, now, now)
+                + self._lease_params(job_id, worker_id, attempt)
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True,
+             attempt: int = None) -> Optional[str]:
+        """
+        Record a failed attempt
+
+        Args:
+            job_id: Job ID
+            worker_id: Worker that ran the attempt
+            error: Error message
+            retry: Re-queue the job if it has attempts left
+            attempt: The claim's attempt number (job["attempts"]), if known
+
+        Returns:
+            The job's new status ("queued" or "failed"), or None if the worker
+            no longer owns the job (lease lost) and nothing was changed
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT attempts, max_attempts FROM jobs WHERE {self._lease_clause(attempt)}",
+                self._lease_params(job_id, worker_id, attempt)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            if retry and row["attempts"] < row["max_attempts"]:
+                status, finished_at = "queued", None
+            else:
+                status, finished_at = "failed", now
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, message = ?, worker_id = NULL, lease_expires = NULL, "
+                "finished_at = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, error, finished_at, now, job_id)
+            )
+            conn.execute("COMMIT")
+            return status
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row) if row else None
+        finally:
+            conn.close()
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Lightweight view of a job (no payload or result)"""
+        return self.get_statuses([job_id]).get(job_id)
+
+    def get_statuses(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Lightweight views of several jobs in one query
+
+        Returns:
+            {job_id: job without payload and result}; unknown IDs are omitted
+        """
+        if not job_ids:
+            return {}
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT job_id, kind, status, error, progress, stage, message, details, attempts, "
+                "max_attempts, worker_id, created_at, updated_at, finished_at, "
+                "result IS NOT NULL AS has_result "
+                f"FROM jobs WHERE job_id IN ({','.join('?' for _ in job_ids)})",
+                list(job_ids)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        statuses = {}
+        for row in rows:
+            job = dict(row)
+            job["details"] = json.loads(job["details"]) if job["details"] else None
+            job["has_result"] = bool(job["has_result"])
+            for field in ("created_at", "updated_at", "finished_at"):
+                if job[field] is not None:
+                    job[field] = datetime.fromtimestamp(job[field]).isoformat()
+            statuses[job["job_id"]] = job
+        return statuses
+
+    def cleanup(self, ttl_seconds: int) -> int:
+        """
+        Delete finished jobs older than the TTL, after expiring stale leases
+
+        Returns:
+            Number of jobs removed
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire_leases(conn, now)
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?",
+                (now - ttl_seconds,)
+            )
+            conn.execute("COMMIT")
+            return cursor.rowcount
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
@@ -1,10 +1,10 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional
 from apify_client import ApifyClient
 import pandas as pd
-from transformers import pipeline
 import numpy as np
 from collections import Counter
 import emoji
@@ -15,6 +15,8 @@ import json
 from datetime import datetime
 import os
 
+from model_registry import model_registry
+
 app = FastAPI()
 
 # Configure CORS
@@ -47,18 +49,34 @@ class AnalysisResult(BaseModel):
     negative_comments_sample: list  # Changed from negative_comments to avoid duplication
     sentiment_distribution: dict
 
-# Global variables
-sentiment_analyzer = pipeline(
-    task="sentiment-analysis",
-    model="cardiffnlp/twitter-roberta-base-sentiment",
-    return_all_scores=True
-)
+# Models are built on first use (or by the startup warm-up), not at import time
+def load_comment_sentiment_analyzer():
+    from transformers import pipeline
+    return pipeline(
+        task="sentiment-analysis",
+        model="cardiffnlp/twitter-roberta-base-sentiment",
+        return_all_scores=True
+    )
 
-emotion_classifier = pipeline(
-    "text-classification",
-    model="bhadresh-savani/distilbert-base-uncased-emotion",
-    return_all_scores=True
-)
+def load_comment_emotion_classifier():
+    from transformers import pipeline
+    return pipeline(
+        "text-classification",
+        model="bhadresh-savani/distilbert-base-uncased-emotion",
+        return_all_scores=True
+    )
+
+model_registry.register("comment_sentiment", load_comment_sentiment_analyzer, "cardiffnlp/twitter-roberta-base-sentiment")
+model_registry.register("comment_emotion", load_comment_emotion_classifier, "bhadresh-savani/distilbert-base-uncased-emotion")
+
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background").lower()
+
+@app.on_event("startup")
+async def startup_event():
+    if STARTUP_MODE == "eager":
+        model_registry.load_all()
+    elif STARTUP_MODE == "background":
+        model_registry.warm_up_in_background()
 
 # Helper functions
 def preprocess_text(text):
@@ -176,6 +194,9 @@ async def analyze_comments(request: AnalysisRequest):
         sentiments = []
         emotions = []
         
+        sentiment_analyzer = model_registry.get("comment_sentiment")
+        emotion_classifier = model_registry.get("comment_emotion")
+
         for comment in df['text']:
             try:
                 processed_text = preprocess_text(comment)
@@ -245,6 +266,20 @@ async def analyze_comments(request: AnalysisRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/health")
+async def health_check():
+    """Liveness probe"""
+    return {"status": "alive"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: comment models are loaded (always ready in lazy mode)"""
+    ready = STARTUP_MODE == "lazy" or model_registry.all_loaded()
+    body = {"ready": ready, "startup_mode": STARTUP_MODE, "models": model_registry.status()}
+    if not ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
 @app.get("/history")
 async def get_history():
     # In a real app, you would fetch this from a database
@@ -0,0 +1,32 @@
+import argparse
+import os
+from dotenv import load_dotenv
+
+# Load environment variables so the storage path matches the API's
+load_dotenv()
+
+from storage_manager import StorageManager
+
+
+def migrate_storage(storage_path: str, dry_run: bool = False):
+    """
+    Move a flat video_analysis_storage (videos/, analysis_results/ and
+    reports/ holding every file directly) into the sharded layout. Safe to
+    interrupt and re-run; best run while no analyses are being stored.
+    """
+    storage_manager = StorageManager(storage_path)
+    moved = storage_manager.migrate_to_sharded_layout(dry_run=dry_run)
+    total = sum(moved.values())
+    if dry_run:
+        print(f"Dry run: {total} files would be moved into shard directories")
+    else:
+        print(f"Moved {total} files into shard directories (depth {storage_manager.shard_depth})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate a flat analysis store to the sharded layout")
+    parser.add_argument("--storage-path", default=os.getenv("VIDEO_STORAGE_PATH", "./video_analysis_storage"),
+                        help="Storage directory (defaults to VIDEO_STORAGE_PATH)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the files that would be moved")
+    args = parser.parse_args()
+    migrate_storage(args.storage_path, dry_run=args.dry_run)
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, if the platform exposes it"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _tensor_bytes(obj: Any, seen: set) -> int:
+    """Sum parameter and buffer sizes of any torch modules reachable from obj"""
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (list, tuple)):
+        return sum(_tensor_bytes(item, seen) for item in obj)
+
+    if hasattr(obj, "parameters") and hasattr(obj, "buffers"):
+        try:
+            total = sum(p.numel() * p.element_size() for p in obj.parameters())
+            total += sum(b.numel() * b.element_size() for b in obj.buffers())
+            return total
+        except Exception:
+            return 0
+
+    # Wrappers such as HF pipelines or ultralytics YOLO keep the module in .model
+    return _tensor_bytes(getattr(obj, "model", None), seen)
+
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        Process-wide registry that loads each model once and hands out the warm instance
+        """
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], description: str = None):
+        """
+        Register a model loader under a name
+
+        Args:
+            name: Key used to fetch the model
+            loader: Zero-argument callable that builds the model
+            description: Human-readable description (e.g. the checkpoint id)
+        """
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._status.setdefault(name, {
+                "description": description,
+                "loaded": False,
+                "load_time_seconds": None,
+                "memory_mb": None,
+                "rss_delta_mb": None,
+                "error": None
+            })
+
+    def get(self, name: str) -> Any:
+        """
+        Return the warm model, loading it on first use
+
+        Args:
+            name: Registered model name
+
+        Returns:
+            The loaded model object
+        """
+        if name in self._models:
+            return self._models[name]
+
+        if name not in self._loaders:
+            raise KeyError(f"Model '{name}' is not registered")
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._models:
+                return self._models[name]
+
+            print(f"Loading model '{name}'...")
+            status = self._status[name]
+            rss_before = _rss_bytes()
+            start = time.time()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                status["error"] = str(e)
+                print(f"Error loading model '{name}': {str(e)}")
+                raise
+
+            rss_after = _rss_bytes()
+            status.update({
+                "loaded": True,
+                "load_time_seconds": round(time.time() - start, 2),
+                "memory_mb": round(_tensor_bytes(model, set()) / (1024 * 1024), 1),
+                "rss_delta_mb": round((rss_after - rss_before) / (1024 * 1024), 1) if rss_before is not None and rss_after is not None else None,
+                "error": None
+            })
+            self._models[name] = model
+            print(f"Model '{name}' loaded in {status['load_time_seconds']}s")
+            return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def load_all(self):
+        """Load every registered model (eager startup)"""
+        for name in list(self._loaders):
+            self.get(name)
+
+    def warm_up(self):
+        """Load every registered model, recording failures instead of raising"""
+        for name in list(self._loaders):
+            try:
+                self.get(name)
+            except Exception:
+                # Error is already recorded in the model status
+                pass
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """Start warm_up() on a daemon thread so the server can accept traffic meanwhile"""
+        thread = threading.Thread(target=self.warm_up, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def all_loaded(self) -> bool:
+        return all(name in self._models for name in self._loaders)
+
+    def unload(self, name: str):
+        """Drop a model so the next get() reloads it"""
+        with self._locks.get(name, threading.Lock()):
+            self._models.pop(name, None)
+            if name in self._status:
+                self._status[name].update({"loaded": False, "memory_mb": None, "rss_delta_mb": None})
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Load state, load time and memory footprint for every registered model"""
+        return {name: dict(status) for name, status in self._status.items()}
+
+
+# Shared registry for this worker process
+model_registry = ModelRegistry()
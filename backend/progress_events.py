@@ -0,0 +1,100 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class ProgressBroadcaster:
+    def __init__(self, fetch_statuses: Callable[[List[str]], Dict[str, Dict[str, Any]]],
+                 interval: float = 0.5):
+        """
+        Fans job progress out to push subscribers (SSE / WebSocket)
+
+        A single background loop reads the status of every watched job in one
+        query per interval and forwards an event only when something a client
+        can see has changed, so the cost does not grow with the number of
+        connected dashboards.
+
+        Args:
+            fetch_statuses: Callable(job_ids) -> {job_id: status dict}, run on a thread
+            interval: Seconds between status reads while anyone is subscribed
+        """
+        self.fetch_statuses = fetch_statuses
+        self.interval = interval
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.last_events: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """
+        Start receiving events for a task
+
+        The latest known event (if any) is delivered immediately.
+
+        Returns:
+            Queue that receives event dicts; None marks an unknown task
+        """
+        queue = asyncio.Queue()
+        self.subscribers.setdefault(task_id, set()).add(queue)
+        if task_id in self.last_events:
+            queue.put_nowait(self.last_events[task_id])
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(task_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[task_id]
+            self.last_events.pop(task_id, None)
+
+    @staticmethod
+    def build_event(task_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Client-facing event for a job status"""
+        # Queued and running jobs are both reported as "processing" to clients
+        status = "processing" if job["status"] in ("queued", "running") else job["status"]
+        details = job.get("details") or {}
+        event = {
+            "event": status if status in ("completed", "failed") else "progress",
+            "task_id": task_id,
+            "status": status,
+            "job_status": job["status"],
+            "progress": job["progress"],
+            "stage": job["stage"],
+            "message": job["message"] or job["error"],
+            "attempts": job["attempts"],
+            "partial_metrics": details.get("partial_metrics", {})
+        }
+        if status == "completed":
+            event["results_url"] = f"/analysis-results/{task_id}"
+        return event
+
+    async def _poll_loop(self):
+        loop = asyncio.get_running_loop()
+        while self.subscribers:
+            task_ids = list(self.subscribers)
+            try:
+                statuses = await loop.run_in_executor(None, self.fetch_statuses, task_ids)
+            except Exception as e:
+                print(f"Warning: Could not read job progress: {str(e)}")
+                statuses = None
+
+            if statuses is not None:
+                for task_id in task_ids:
+                    job = statuses.get(task_id)
+                    event = self.build_event(task_id, job) if job else None
+                    if event is not None and event == self.last_events.get(task_id):
+                        continue
+                    if event is not None:
+                        self.last_events[task_id] = event
+                    for queue in list(self.subscribers.get(task_id, ())):
+                        queue.put_nowait(event)
+
+            await asyncio.sleep(self.interval)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode an event as a Server-Sent Events message"""
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
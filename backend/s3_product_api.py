@@ -6,10 +6,15 @@ import uvicorn
 import os
 from datetime import datetime
 import asyncio
+import time
 import uuid
 import shutil
+import socket
 from pathlib import Path
 
+from job_queue import SQLiteJobQueue
+from storage_stats import StorageStats, scan_files
+
 app = FastAPI(
     title="Product Image Management API",
     description="API for managing product images in local storage",
@@ -29,18 +34,14 @@ app.add_middleware(
 BASE_STORAGE_PATH = "./product_images"
 os.makedirs(BASE_STORAGE_PATH, exist_ok=True)
 
-# In-memory storage for upload tasks (use database in production)
-upload_tasks = {}
+# Durable upload task records, shared by every worker process on this host
+PRODUCT_UPLOAD_JOB = "product_upload"
+UPLOAD_JOB_TTL_SECONDS = int(os.getenv("UPLOAD_JOB_TTL_SECONDS", str(24 * 3600)))
+upload_jobs = SQLiteJobQueue(os.getenv("UPLOAD_JOB_DB", os.path.join(BASE_STORAGE_PATH, "upload_jobs.db")))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
 
-class UploadTask:
-    def __init__(self, task_id: str, product_name: str, user_id: str):
-        self.task_id = task_id
-        self.product_name = product_name
-        self.user_id = user_id
-        self.status = "processing"  # processing, completed, failed
-        self.progress = 0
-        self.result = None
-        self.created_at = datetime.now()
+# Seconds between background audits of the storage statistics (0 disables)
+STORAGE_AUDIT_INTERVAL_SECONDS = int(os.getenv("STORAGE_AUDIT_INTERVAL_SECONDS", "0"))
 
 class LocalStorageManager:
     def __init__(self, base_path: str = BASE_STORAGE_PATH):
@@ -48,6 +49,12 @@ class LocalStorageManager:
         self.base_path.mkdir(exist_ok=True)
         print(f"Local Storage Manager initialized with path: {base_path}")
 
+        # Product/image totals maintained on upload and delete, so
+        # /storage/info does not scan every image; established by one scan
+        self.stats = StorageStats(str(self.base_path / "storage_stats.db"))
+        if self.stats.needs_audit:
+            self.audit_storage_stats()
+
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for filesystem compatibility"""
         # Replace spaces and special characters
@@ -74,7 +81,10 @@ class LocalStorageManager:
         try:
             # Create product directory
             product_path = self._get_product_path(product_name, user_id)
+            new_product = not product_path.exists()
             product_path.mkdir(parents=True, exist_ok=True)
+            if new_product:
+                self._record_stats(products=1)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             uploaded_files = []
@@ -95,8 +105,14 @@ class LocalStorageManager:
                     unique_filename = f"{self._sanitize_filename(product_name)}_{timestamp}_{i+1}{file_extension}"
                     destination_path = product_path / unique_filename
                     
-                    # Copy file to product directory
+                    # Copy file to product directory (replacing a same-named file is not a new image)
+                    replaced_size = destination_path.stat().st_size if destination_path.exists() else None
                     shutil.copy2(file_path, destination_path)
+                    stored_size = destination_path.stat().st_size
+                    if replaced_size is None:
+                        self._record_stats(images=1, size=stored_size)
+                    else:
+                        self._record_stats(size=stored_size - replaced_size)
                     
                     uploaded_files.append({
                         'original_name': file_path.name,
@@ -234,11 +250,15 @@ class LocalStorageManager:
                     'error': 'Product not found'
                 }
             
-            # Count files before deletion
-            file_count = len(list(product_path.glob("*.*")))
+            # Count files before deletion (only this product's directory is scanned)
+            file_count, total_size = 0, 0
+            for entry in scan_files(str(product_path)):
+                file_count += 1
+                total_size += entry.stat(follow_symlinks=False).st_size
             
             # Remove directory and all contents
             shutil.rmtree(product_path)
+            self._record_stats(products=-1, images=-file_count, size=-total_size)
             
             return {
                 'success': True,
@@ -253,9 +273,80 @@ class LocalStorageManager:
                 'error': str(e)
             }
 
+    def _record_stats(self, products: int = 0, images: int = 0, size: int = 0):
+        try:
+            self.stats.record({"products": (products, 0), "images": (images, size)})
+        except Exception as e:
+            # The files are stored either way; the next audit corrects the totals
+            print(f"Warning: Could not update storage statistics: {str(e)}")
+
+    def audit_storage_stats(self) -> Dict:
+        """
+        Recount products and images on disk and reconcile the storage statistics
+
+        Returns:
+            Drift that was corrected per category (see StorageStats.reconcile)
+        """
+        total_products, total_images, total_size = 0, 0, 0
+        for user_dir in self.base_path.iterdir():
+            if user_dir.is_dir():
+                for product_dir in user_dir.iterdir():
+                    if product_dir.is_dir():
+                        total_products += 1
+                        for entry in scan_files(str(product_dir)):
+                            total_images += 1
+                            total_size += entry.stat(follow_symlinks=False).st_size
+
+        drift = self.stats.reconcile({"products": (total_products, 0), "images": (total_images, total_size)})
+        if any(values["count"] or values["bytes"] for values in drift.values()):
+            print(f"Storage statistics reconciled, drift: {drift}")
+        return drift
+
+    def storage_info(self) -> Dict:
+        """Product/image totals from the maintained statistics (no directory scans)"""
+        totals = self.stats.totals()
+        total_size = totals.get("images", {}).get("bytes", 0)
+        audited = [values["audited_at"] for values in totals.values() if values["audited_at"]]
+        return {
+            "storage_type": "local_filesystem",
+            "base_path": BASE_STORAGE_PATH,
+            "total_products": totals.get("products", {}).get("count", 0),
+            "total_images": totals.get("images", {}).get("count", 0),
+            "total_size_bytes": total_size,
+            "total_size_mb": round(total_size / (1024 * 1024), 2),
+            "last_audit": datetime.fromtimestamp(min(audited)).isoformat() if audited else None
+        }
+
 # Initialize Local Storage Manager
 storage_manager = LocalStorageManager()
 
+@app.on_event("startup")
+async def schedule_upload_job_cleanup():
+    # The first pass runs at startup, failing uploads orphaned by a previous
+    # process once their lease has run out
+    async def cleanup_periodically():
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, upload_jobs.cleanup, UPLOAD_JOB_TTL_SECONDS)
+            except Exception as e:
+                print(f"Warning: Upload job cleanup failed: {e}")
+            await asyncio.sleep(3600)
+
+    asyncio.create_task(cleanup_periodically())
+
+    async def audit_storage_periodically():
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(STORAGE_AUDIT_INTERVAL_SECONDS)
+            try:
+                await loop.run_in_executor(None, storage_manager.audit_storage_stats)
+            except Exception as e:
+                print(f"Warning: Storage audit failed: {e}")
+
+    if STORAGE_AUDIT_INTERVAL_SECONDS > 0:
+        asyncio.create_task(audit_storage_periodically())
+
 @app.get("/")
 async def root():
     return {
@@ -310,10 +401,15 @@ async def upload_product(
                 detail=f"File type not allowed: {file.filename}. Allowed types: {', '.join(allowed_extensions)}"
             )
     
-    # Create upload task
-    task_id = str(uuid.uuid4())
-    upload_task = UploadTask(task_id, product_name, user_id)
-    upload_tasks[task_id] = upload_task
+    # Create upload task. The files are only readable by this request, so the
+    # job is claimed right away by this process and never retried elsewhere.
+    task_id = upload_jobs.enqueue(
+        PRODUCT_UPLOAD_JOB,
+        {"product_name": product_name, "user_id": user_id, "file_count": len(files)},
+        job_id=str(uuid.uuid4()),
+        max_attempts=1
+    )
+    upload_jobs.claim_job(task_id, WORKER_ID, lease_seconds=3600)
     
     # Start background processing
     background_tasks.add_task(
@@ -340,9 +436,7 @@ async def process_upload_task(
 ):
     """Process upload task in background"""
     try:
-        task = upload_tasks[task_id]
-        task.status = "processing"
-        task.progress = 10
+        upload_jobs.update_progress(task_id, progress=10)
         
         # Save files temporarily and process
         temp_files = []
@@ -360,9 +454,9 @@ async def process_upload_task(
                 temp_files.append(temp_path)
                 
                 # Update progress
-                task.progress = 10 + (i / len(files)) * 40
+                upload_jobs.update_progress(task_id, progress=10 + (i / len(files)) * 40)
                 
-            task.progress = 50
+            upload_jobs.update_progress(task_id, progress=50)
             
             # Upload to local storage using the saved temp files
             upload_result = storage_manager.upload_product_images(
@@ -371,13 +465,10 @@ async def process_upload_task(
                 user_id=user_id
             )
             
-            task.progress = 100
-            task.status = "completed"
-            task.result = upload_result
+            upload_jobs.complete(task_id, WORKER_ID, upload_result)
             
         except Exception as e:
-            task.status = "failed"
-            task.result = {"error": str(e)}
+            upload_jobs.fail(task_id, WORKER_ID, str(e), retry=False)
             print(f"Error in upload processing: {e}")
         finally:
             # Clean up temporary files
@@ -389,26 +480,30 @@ async def process_upload_task(
                     print(f"Error cleaning up temp file {temp_file}: {e}")
                     
     except Exception as e:
-        task = upload_tasks[task_id]
-        task.status = "failed"
-        task.result = {"error": str(e)}
+        upload_jobs.fail(task_id, WORKER_ID, str(e), retry=False)
         print(f"Upload task failed: {e}")
 
 @app.get("/upload/status/{task_id}")
 async def get_upload_status(task_id: str):
     """Get status of an upload task"""
-    if task_id not in upload_tasks:
+    job = upload_jobs.get(task_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Task not found")
+    if job["status"] == "running" and job["lease_expires"] < time.time():
+        # The process handling the upload died; upload jobs are never retried
+        upload_jobs.expire_leases()
+        job = upload_jobs.get(task_id)
     
-    task = upload_tasks[task_id]
+    # Queued and running jobs are both reported as "processing"
+    status = "processing" if job["status"] in ("queued", "running") else job["status"]
     return {
         "task_id": task_id,
-        "status": task.status,
-        "progress": task.progress,
-        "product_name": task.product_name,
-        "user_id": task.user_id,
-        "created_at": task.created_at.isoformat(),
-        "result": task.result
+        "status": status,
+        "progress": job["progress"],
+        "product_name": job["payload"]["product_name"],
+        "user_id": job["payload"]["user_id"],
+        "created_at": job["created_at"],
+        "result": job["result"] if job["status"] != "failed" else {"error": job["error"]}
     }
 
 @app.get("/products")
@@ -536,33 +631,21 @@ async def get_image(user_id: str, product_name: str, filename: str):
 
 @app.get("/storage/info")
 async def get_storage_info():
-    """Get storage information"""
+    """Get storage information (maintained totals, no directory scan)"""
     try:
-        total_size = 0
-        total_products = 0
-        total_images = 0
-        
-        for user_dir in Path(BASE_STORAGE_PATH).iterdir():
-            if user_dir.is_dir():
-                for product_dir in user_dir.iterdir():
-                    if product_dir.is_dir():
-                        total_products += 1
-                        for image_file in product_dir.iterdir():
-                            if image_file.is_file():
-                                total_images += 1
-                                total_size += image_file.stat().st_size
-        
-        return {
-            "storage_type": "local_filesystem",
-            "base_path": BASE_STORAGE_PATH,
-            "total_products": total_products,
-            "total_images": total_images,
-            "total_size_bytes": total_size,
-            "total_size_mb": round(total_size / (1024 * 1024), 2)
-        }
+        return await asyncio.get_running_loop().run_in_executor(None, storage_manager.storage_info)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting storage info: {str(e)}")
 
+@app.post("/storage/stats/audit")
+async def audit_storage_stats():
+    """Recount products and images on disk and correct the maintained totals"""
+    try:
+        drift = await asyncio.get_running_loop().run_in_executor(None, storage_manager.audit_storage_stats)
+        return {"success": True, "drift": drift}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error auditing storage: {str(e)}")
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
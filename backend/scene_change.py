@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+
+
+class SceneChangeDetector:
+    def __init__(self, hist_threshold: float = 0.2, pixel_threshold: float = 12.0,
+                 max_interval: int = 15, thumbnail_size: tuple = (64, 36)):
+        """
+        Cheap frame-difference test used to decide when a frame needs detection
+
+        Each frame is compared against the last keyframe on a tiny grayscale
+        thumbnail, using both a histogram distance (cuts, lighting changes) and
+        the mean absolute pixel difference (motion within a similar scene).
+
+        Args:
+            hist_threshold: Bhattacharyya histogram distance that counts as a change
+            pixel_threshold: Mean absolute grayscale difference (0-255) that counts as a change
+            max_interval: Force a keyframe at least once every N frames
+            thumbnail_size: (width, height) of the comparison thumbnail
+        """
+        self.hist_threshold = hist_threshold
+        self.pixel_threshold = pixel_threshold
+        self.max_interval = max(int(max_interval), 1)
+        self.thumbnail_size = thumbnail_size
+
+        self.last_thumbnail = None
+        self.last_hist = None
+        self.frames_since_keyframe = 0
+        self.keyframes = 0
+        self.frames_seen = 0
+
+    def thumbnail(self, frame) -> np.ndarray:
+        """Downscale a BGR (or grayscale) frame to the comparison thumbnail"""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+
+    def is_keyframe(self, frame=None, thumbnail: np.ndarray = None) -> bool:
+        """
+        Decide whether this frame differs enough from the last keyframe
+
+        Args:
+            frame: BGR frame to test (ignored when thumbnail is given)
+            thumbnail: Precomputed grayscale thumbnail of the frame
+
+        Returns:
+            True if the frame should be sent to the detector
+        """
+        if thumbnail is None:
+            thumbnail = self.thumbnail(frame)
+        self.frames_seen += 1
+
+        hist = cv2.calcHist([thumbnail], [0], None, [32], [0, 256])
+        cv2.normalize(hist, hist)
+
+        changed = (
+            self.last_thumbnail is None
+            or self.frames_since_keyframe + 1 >= self.max_interval
+            or cv2.compareHist(self.last_hist, hist, cv2.HISTCMP_BHATTACHARYYA) > self.hist_threshold
+            or cv2.absdiff(self.last_thumbnail, thumbnail).mean() > self.pixel_threshold
+        )
+
+        if changed:
+            self.last_thumbnail = thumbnail
+            self.last_hist = hist
+            self.frames_since_keyframe = 0
+            self.keyframes += 1
+        else:
+            self.frames_since_keyframe += 1
+
+        return changed
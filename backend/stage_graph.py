@@ -0,0 +1,116 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class StageGraph:
+    def __init__(self, max_workers: int = 4):
+        """
+        Small dependency graph of pipeline stages
+
+        Every stage starts as soon as all of its dependencies have finished, so
+        independent branches run concurrently and the wall time approaches the
+        longest branch instead of the sum of all stages.
+
+        Args:
+            max_workers: Maximum number of stages running at the same time
+        """
+        self.max_workers = max_workers
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, float] = {}
+        self._partial: Dict[str, float] = {}
+        self._completed: set = set()
+        self._progress_callback: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, fn: Callable[[Dict[str, Any]], Any],
+                  depends_on: Iterable[str] = (), weight: float = 1.0):
+        """
+        Add a stage to the graph
+
+        Args:
+            name: Unique stage name
+            fn: Callable receiving a dict of {dependency name: dependency output}
+            depends_on: Names of the stages whose outputs this stage needs
+            weight: Share of the total work, used for progress reporting
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        self.stages[name] = {"fn": fn, "depends_on": tuple(depends_on), "weight": weight}
+
+    def report(self, name: str, fraction: float):
+        """Report partial progress (0-1) from inside a running stage"""
+        with self._lock:
+            self._partial[name] = min(max(fraction, 0.0), 1.0)
+        self._notify(name, "progress")
+
+    def _progress(self) -> float:
+        total = sum(stage["weight"] for stage in self.stages.values()) or 1.0
+        done = sum(
+            stage["weight"] * (1.0 if name in self._completed else self._partial.get(name, 0.0))
+            for name, stage in self.stages.items()
+        )
+        return done / total
+
+    def _notify(self, name: str, event: str):
+        if self._progress_callback:
+            with self._lock:
+                progress = self._progress()
+            self._progress_callback(progress, name, event)
+
+    def _validate(self):
+        for name, stage in self.stages.items():
+            for dependency in stage["depends_on"]:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+
+    def run(self, progress_callback: Optional[Callable[[float, str, str], None]] = None) -> Dict[str, Any]:
+        """
+        Run every stage, respecting dependencies
+
+        Args:
+            progress_callback: Optional callable receiving (progress 0-1, stage name, event)
+                where event is "started", "progress" or "completed"
+
+        Returns:
+            Dictionary of {stage name: stage output}
+        """
+        self._validate()
+        self._progress_callback = progress_callback
+        outputs: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running = {}
+
+        def execute(name: str, inputs: Dict[str, Any]):
+            start = time.time()
+            try:
+                return self.stages[name]["fn"](inputs)
+            finally:
+                self.timings[name] = round(time.time() - start, 3)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while pending or running:
+                ready = [
+                    name for name, stage in pending.items()
+                    if all(dependency in outputs for dependency in stage["depends_on"])
+                ]
+                for name in ready:
+                    inputs = {dependency: outputs[dependency] for dependency in pending[name]["depends_on"]}
+                    del pending[name]
+                    running[executor.submit(execute, name, inputs)] = name
+                    self._notify(name, "started")
+
+                if not running:
+                    raise ValueError(f"Dependency cycle between stages: {sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    # Re-raises the stage's exception; remaining stages are abandoned
+                    outputs[name] = future.result()
+                    with self._lock:
+                        self._completed.add(name)
+                    self._notify(name, "completed")
+
+        return outputs
@@ -1,47 +1,268 @@
+import errno
+import hashlib
 import json
 import os
 import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import shutil
+import threading
+
+from analysis_catalog import AnalysisCatalog
+from frame_series import FrameSeries
+from storage_stats import StorageStats, scan_files, file_size
 
 class StorageManager:
-    def __init__(self, base_storage_path: str = "./video_analysis_storage"):
+    # Storage directories whose size is tracked in the storage statistics
+    STAT_CATEGORIES = ("videos", "analysis_results", "reports")
+    # Per-analysis files with a fixed name: {kind: (storage directory, filename suffix)}
+    ANALYSIS_FILES = {
+        "json": ("analysis_results", ".json"),
+        "frames": ("analysis_results", "_frames.npz"),
+        "report": ("reports", "_summary.txt")
+    }
+    # Catalog column holding the path of each kind of file
+    CATALOG_PATH_COLUMNS = {"video": "video_path", "json": "json_path", "frames": "frames_path", "report": "report_path"}
+
+    def __init__(self, base_storage_path: str = "./video_analysis_storage", shard_depth: int = 2):
         """
         Initialize storage manager
         
+        Files are kept in hash-prefix shard directories (for example
+        videos/3f/a2/<analysis_id>.mp4) so no directory grows past a few
+        hundred entries. Stores created before sharding keep working: files
+        still in the flat directories are found there until they are moved by
+        migrate_to_sharded_layout (see migrate_storage.py).
+        
         Args:
             base_storage_path: Base directory for storing all analysis data
+            shard_depth: Number of two-hex-digit directory levels for new stores
+                (an existing store keeps the depth recorded in its layout.json)
         """
         self.base_storage_path = base_storage_path
         self.ensure_storage_directories()
+        self.shard_depth = self._load_layout(shard_depth)
+        # Only stat the flat directories while some files are still there
+        self.flat_fallback = self._has_flat_files()
+
+        # Catalog of stored analyses (listing, content-hash lookups); rebuilt
+        # from the files on disk when it is missing
+        self.catalog = AnalysisCatalog(os.path.join(self.base_storage_path, "catalog.db"))
+        self._rebuild_lock = threading.Lock()
+        if self.catalog.needs_rebuild or (self.catalog.count() == 0 and self._stored_analysis_ids()):
+            self.rebuild_catalog()
+
+        # File counts and sizes, kept up to date on store/delete so /storage/info
+        # never walks the tree; established by one scan the first time
+        self.stats = StorageStats(os.path.join(self.base_storage_path, "storage_stats.db"))
+        if self.stats.needs_audit:
+            self.audit_storage_stats()
     
+    @property
+    def incoming_dir(self) -> str:
+        """Landing directory for uploads, on the same volume as videos/ so they can be renamed into place"""
+        return os.path.join(self.base_storage_path, "incoming")
+
     def ensure_storage_directories(self):
         """Create necessary directories if they don't exist"""
         directories = [
             self.base_storage_path,
             os.path.join(self.base_storage_path, "videos"),
             os.path.join(self.base_storage_path, "analysis_results"),
-            os.path.join(self.base_storage_path, "reports")
+            os.path.join(self.base_storage_path, "reports"),
+            self.incoming_dir
         ]
         
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
             print(f"Ensured directory exists: {directory}")
     
+    def _load_layout(self, shard_depth: int) -> int:
+        """Shard depth of this store, recorded on first use so it never changes under existing files"""
+        layout_path = os.path.join(self.base_storage_path, "layout.json")
+        if os.path.exists(layout_path):
+            with open(layout_path, 'r', encoding='utf-8') as layout_file:
+                return int(json.load(layout_file)["shard_depth"])
+        
+        tmp_path = f"{layout_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as layout_file:
+            json.dump({"layout": "sharded", "shard_depth": shard_depth}, layout_file)
+        os.replace(tmp_path, layout_path)
+        return shard_depth
+
+    def _has_flat_files(self) -> bool:
+        """Whether any stored file still sits directly in a storage directory (pre-sharding layout)"""
+        for category in self.STAT_CATEGORIES:
+            with os.scandir(os.path.join(self.base_storage_path, category)) as entries:
+                if any(entry.is_file() and not entry.name.endswith(".tmp") for entry in entries):
+                    return True
+        return False
+
+    def shard_dir(self, category: str, analysis_id: str) -> str:
+        """Shard directory of an analysis within a storage directory (computed, never listed)"""
+        digest = hashlib.md5(analysis_id.encode("utf-8")).hexdigest()
+        levels = [digest[2 * level:2 * level + 2] for level in range(self.shard_depth)]
+        return os.path.join(self.base_storage_path, category, *levels)
+
+    def _resolve_path(self, category: str, filename: str, analysis_id: str) -> str:
+        """
+        Path of a stored file: its shard path, or the flat path for files not migrated yet
+        
+        Returns the shard path when the file exists in neither place.
+        """
+        sharded_path = os.path.join(self.shard_dir(category, analysis_id), filename)
+        if self.flat_fallback and not os.path.exists(sharded_path):
+            flat_path = os.path.join(self.base_storage_path, category, filename)
+            if os.path.exists(flat_path):
+                return flat_path
+        return sharded_path
+
+    def analysis_file_path(self, kind: str, analysis_id: str) -> str:
+        """Path of one of an analysis' fixed-name files (kind: "json", "frames" or "report")"""
+        category, suffix = self.ANALYSIS_FILES[kind]
+        return self._resolve_path(category, f"{analysis_id}{suffix}", analysis_id)
+
+    def analysis_json_path(self, analysis_id: str) -> str:
+        return self.analysis_file_path("json", analysis_id)
+
+    def report_path(self, analysis_id: str) -> str:
+        return self.analysis_file_path("report", analysis_id)
+
+    def find_video_path(self, analysis_id: str) -> Optional[str]:
+        """
+        Stored video of an analysis
+        
+        The catalog records the path (the extension varies); otherwise only
+        the analysis' own shard directory is listed.
+        """
+        entry = self.catalog.get(analysis_id)
+        if entry is not None and entry["video_path"] and os.path.exists(entry["video_path"]):
+            return entry["video_path"]
+        
+        directories = [self.shard_dir("videos", analysis_id)]
+        if self.flat_fallback:
+            directories.append(os.path.join(self.base_storage_path, "videos"))
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                if os.path.splitext(filename)[0] == analysis_id:
+                    return os.path.join(directory, filename)
+        return None
+
+    def find_analysis_by_content(self, content_hash: str, pipeline_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a stored analysis of identical video content
+        
+        Args:
+            content_hash: SHA-256 of the uploaded video bytes
+            pipeline_version: Only results from this pipeline version are reused
+            
+        Returns:
+            Index entry of the stored analysis, or None
+        """
+        entry = self.catalog.find_by_content(content_hash, pipeline_version)
+        if entry is None:
+            return None
+        
+        if not os.path.exists(self.analysis_json_path(entry['analysis_id'])):
+            return None
+        return entry
+
+    def _stored_analysis_ids(self) -> list:
+        results_dir = os.path.join(self.base_storage_path, "analysis_results")
+        return [entry.name[:-len(".json")] for entry in scan_files(results_dir) if entry.name.endswith(".json")]
+
+    def rebuild_catalog(self) -> int:
+        """
+        Rebuild the analysis catalog from the files on disk
+        
+        Reads every analysis JSON once; hashes of analyses stored before the
+        catalog existed are taken from the legacy content_index.jsonl.
+        
+        Returns:
+            Number of analyses in the rebuilt catalog
+        """
+        with self._rebuild_lock:
+            print("Rebuilding analysis catalog from disk...")
+            videos_dir = os.path.join(self.base_storage_path, "videos")
+            videos = {os.path.splitext(entry.name)[0]: entry.path for entry in scan_files(videos_dir)
+                      if not entry.name.endswith(".tmp")}
+
+            legacy_hashes = {}
+            legacy_index_path = os.path.join(self.base_storage_path, "content_index.jsonl")
+            if os.path.exists(legacy_index_path):
+                with open(legacy_index_path, 'r', encoding='utf-8') as index_file:
+                    for line in index_file:
+                        try:
+                            legacy = json.loads(line)
+                            legacy_hashes[legacy["analysis_id"]] = legacy
+                        except (ValueError, KeyError):
+                            continue
+
+            entries = []
+            for analysis_id in self._stored_analysis_ids():
+                analysis_data = self.get_analysis_by_id(analysis_id)
+                if "error" in analysis_data:
+                    print(f"Skipping unreadable analysis {analysis_id}: {analysis_data['error']}")
+                    continue
+                legacy = legacy_hashes.get(analysis_id, {})
+                entries.append(self._catalog_entry(
+                    analysis_id,
+                    analysis_data,
+                    video_path=videos.get(analysis_id),
+                    content_hash=analysis_data.get("content_hash") or legacy.get("content_hash"),
+                    pipeline_version=analysis_data.get("pipeline_version") or legacy.get("pipeline_version")
+                ))
+
+            count = self.catalog.replace_all(entries)
+            print(f"Analysis catalog rebuilt with {count} analyses")
+            return count
+
+    def _catalog_entry(self, analysis_id: str, analysis_data: Dict[str, Any], video_path: str = None,
+                       content_hash: str = None, pipeline_version: str = None) -> Dict[str, Any]:
+        """Catalog row for a stored analysis (analysis_data is the stored JSON document)"""
+        report_path = self.report_path(analysis_id)
+        frames_path = self.frame_series_path(analysis_id)
+        results = analysis_data.get("data", {})
+        products = {}
+        for product in results.get("detected_products") or []:
+            name = product.get("name")
+            if name:
+                products[name] = products.get(name, 0) + (product.get("count") or 0)
+        return {
+            "analysis_id": analysis_id,
+            "timestamp": analysis_data.get("timestamp") or "",
+            "overall_score": results.get("metrics", {}).get("overall_effectiveness_score", 0),
+            **AnalysisCatalog.score_fields(results),
+            "products": products,
+            "content_hash": content_hash,
+            "pipeline_version": pipeline_version,
+            "video_path": video_path,
+            "json_path": self.analysis_json_path(analysis_id),
+            "report_path": report_path if os.path.exists(report_path) else None,
+            "frames_path": frames_path if os.path.exists(frames_path) else None
+        }
+    
     def generate_analysis_id(self) -> str:
         """Generate unique analysis ID with timestamp"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         unique_id = str(uuid.uuid4())[:8]
         return f"analysis_{timestamp}_{unique_id}"
     
-    def store_video_file(self, video_file_path: str, analysis_id: str) -> str:
+    def store_video_file(self, video_file_path: str, analysis_id: str, move: bool = False) -> str:
         """
         Store video file in organized directory structure
         
+        The file is committed without copying whenever possible: an atomic
+        rename when move is set, otherwise a hardlink. Copying is only the
+        fallback when the source is on another filesystem (or links are not
+        supported).
+        
         Args:
             video_file_path: Path to the original video file
             analysis_id: Unique analysis ID
+            move: Take ownership of the source file instead of leaving it in place
             
         Returns:
             Path where video was stored
@@ -51,14 +272,25 @@ class StorageManager:
             file_extension = os.path.splitext(video_file_path)[1]
             
             # Create destination path
-            stored_video_path = os.path.join(
-                self.base_storage_path, 
-                "videos", 
-                f"{analysis_id}{file_extension}"
-            )
-            
-            # Copy video file
-            shutil.copy2(video_file_path, stored_video_path)
+            video_dir = self.shard_dir("videos", analysis_id)
+            os.makedirs(video_dir, exist_ok=True)
+            stored_video_path = os.path.join(video_dir, f"{analysis_id}{file_extension}")
+            
+            try:
+                if move:
+                    os.replace(video_file_path, stored_video_path)
+                else:
+                    os.link(video_file_path, stored_video_path)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
+                # Different filesystem (or no hardlinks): fall back to a copy
+                print(f"Zero-copy store not possible ({e.strerror}), copying video")
+                tmp_path = f"{stored_video_path}.tmp"
+                shutil.copy2(video_file_path, tmp_path)
+                os.replace(tmp_path, stored_video_path)
+                if move:
+                    os.remove(video_file_path)
             print(f"Video stored at: {stored_video_path}")
             
             return stored_video_path
@@ -67,16 +299,19 @@ class StorageManager:
             print(f"Error storing video file: {str(e)}")
             raise
     
-    def store_analysis_results(self, analysis_id: str, results: Dict[str, Any]) -> str:
+    def store_analysis_results(self, analysis_id: str, results: Dict[str, Any],
+                               content_hash: str = None, pipeline_version: str = None) -> Dict[str, Any]:
         """
         Store analysis results as JSON file
         
         Args:
             analysis_id: Unique analysis ID
             results: Analysis results dictionary
+            content_hash: SHA-256 of the analyzed video (optional)
+            pipeline_version: Version of the pipeline that produced the results (optional)
             
         Returns:
-            Path to the stored JSON file
+            The stored JSON document (metadata plus results)
         """
         try:
             # Add metadata to results
@@ -84,34 +319,82 @@ class StorageManager:
                 "analysis_id": analysis_id,
                 "timestamp": datetime.now().isoformat(),
                 "version": "1.0",
+                "content_hash": content_hash,
+                "pipeline_version": pipeline_version,
                 "data": results
             }
             
             # Create JSON file path
-            json_file_path = os.path.join(
-                self.base_storage_path,
-                "analysis_results",
-                f"{analysis_id}.json"
-            )
+            json_file_path = self.analysis_json_path(analysis_id)
+            os.makedirs(os.path.dirname(json_file_path), exist_ok=True)
             
-            # Write JSON file with proper formatting
-            with open(json_file_path, 'w', encoding='utf-8') as json_file:
-                json.dump(results_with_metadata, json_file, indent=2, ensure_ascii=False)
+            # Compact JSON; bulky per-frame series are stored separately (see store_frame_series).
+            # Written to a temp file and renamed so readers never see a partial file
+            tmp_path = f"{json_file_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as json_file:
+                json.dump(results_with_metadata, json_file, separators=(",", ":"), ensure_ascii=False)
+            os.replace(tmp_path, json_file_path)
             
             print(f"Analysis results stored at: {json_file_path}")
-            return json_file_path
+            return results_with_metadata
             
         except Exception as e:
             print(f"Error storing analysis results: {str(e)}")
             raise
     
-    def store_complete_analysis(self, video_file_path: str, results: Dict[str, Any]) -> Dict[str, Any]:
+    def frame_series_path(self, analysis_id: str) -> str:
+        return self.analysis_file_path("frames", analysis_id)
+
+    def store_frame_series(self, analysis_id: str, frame_series: FrameSeries) -> str:
+        """
+        Store full-resolution per-frame data in a compressed columnar file
+        
+        Args:
+            analysis_id: Unique analysis ID
+            frame_series: Per-frame columns of the analysis
+            
+        Returns:
+            Path to the stored .npz file
+        """
+        frames_path = self.frame_series_path(analysis_id)
+        os.makedirs(os.path.dirname(frames_path), exist_ok=True)
+        frame_series.save(frames_path)
+        print(f"Frame series stored at: {frames_path}")
+        return frames_path
+
+    def get_frame_series(self, analysis_id: str) -> Optional[FrameSeries]:
+        """
+        Load the full-resolution per-frame data of an analysis
+        
+        Analyses stored before the columnar format fall back to the frameData
+        embedded in their JSON file.
+        
+        Returns:
+            FrameSeries, or None if the analysis does not exist
+        """
+        frames_path = self.frame_series_path(analysis_id)
+        if os.path.exists(frames_path):
+            return FrameSeries.load(frames_path)
+
+        analysis_data = self.get_analysis_by_id(analysis_id)
+        if "error" in analysis_data:
+            return None
+        records = analysis_data.get("data", {}).get("visualization_data", {}).get("frameData", [])
+        return FrameSeries.from_records(records)
+
+    def store_complete_analysis(self, video_file_path: str, results: Dict[str, Any],
+                                content_hash: str = None, pipeline_version: str = None,
+                                frame_series: FrameSeries = None, move_video: bool = False) -> Dict[str, Any]:
         """
         Complete storage operation - stores both video and analysis results
         
         Args:
             video_file_path: Path to the original video file
             results: Analysis results dictionary
+            content_hash: SHA-256 of the video, recorded in the content index (optional)
+            pipeline_version: Pipeline version the content index entry is valid for (optional)
+            frame_series: Full-resolution per-frame data, stored next to the JSON (optional)
+            move_video: Move the video into storage instead of linking/copying it
             
         Returns:
             Dictionary with storage paths
@@ -121,18 +404,30 @@ class StorageManager:
             analysis_id = self.generate_analysis_id()
             
             # Store video file
-            stored_video_path = self.store_video_file(video_file_path, analysis_id)
+            stored_video_path = self.store_video_file(video_file_path, analysis_id, move=move_video)
+            
+            # Store per-frame data first so the JSON never references a missing file
+            frames_path = self.store_frame_series(analysis_id, frame_series) if frame_series is not None else None
             
             # Store analysis results
-            stored_json_path = self.store_analysis_results(analysis_id, results)
+            stored_document = self.store_analysis_results(analysis_id, results, content_hash, pipeline_version)
+            stored_json_path = self.analysis_json_path(analysis_id)
             
             # Generate summary report
             report_path = self.generate_summary_report(analysis_id, results)
             
+            # Commit the analysis to the catalog (listing and content-hash lookups)
+            # once every file is in place
+            self.catalog.add(self._catalog_entry(
+                analysis_id, stored_document, stored_video_path, content_hash, pipeline_version
+            ))
+            self._record_stats(1, stored_video_path, stored_json_path, frames_path, report_path)
+            
             return {
                 "analysis_id": analysis_id,
                 "video_path": stored_video_path,
                 "json_path": stored_json_path,
+                "frames_path": frames_path,
                 "report_path": report_path,
                 "success": True
             }
@@ -160,11 +455,8 @@ class StorageManager:
             Path to the summary report
         """
         try:
-            report_path = os.path.join(
-                self.base_storage_path,
-                "reports",
-                f"{analysis_id}_summary.txt"
-            )
+            report_path = self.report_path(analysis_id)
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
             
             with open(report_path, 'w', encoding='utf-8') as report_file:
                 report_file.write(f"VIDEO ANALYSIS REPORT\n")
@@ -222,11 +514,7 @@ class StorageManager:
             Analysis data dictionary
         """
         try:
-            json_file_path = os.path.join(
-                self.base_storage_path,
-                "analysis_results",
-                f"{analysis_id}.json"
-            )
+            json_file_path = self.analysis_json_path(analysis_id)
             
             if not os.path.exists(json_file_path):
                 return {"error": f"Analysis {analysis_id} not found"}
@@ -237,33 +525,232 @@ class StorageManager:
         except Exception as e:
             return {"error": f"Error retrieving analysis: {str(e)}"}
     
-    def list_all_analyses(self) -> list:
+    def list_all_analyses(self, limit: Optional[int] = None, offset: int = 0,
+                          sort_by: str = "timestamp", descending: bool = True) -> list:
         """
-        List all stored analyses
+        List stored analyses from the catalog (no analysis files are opened)
+        
+        Args:
+            limit: Page size (all analyses if None)
+            offset: Number of analyses to skip
+            sort_by: "timestamp", "overall_score" or "analysis_id"
+            descending: Sort order (newest / highest first by default)
         
         Returns:
             List of analysis metadata
         """
+        return [
+            {
+                'analysis_id': entry['analysis_id'],
+                'timestamp': entry['timestamp'],
+                'overall_score': entry['overall_score']
+            }
+            for entry in self.catalog.list(limit, offset, sort_by, descending)
+        ]
+    
+    def count_analyses(self) -> int:
+        return self.catalog.count()
+
+    def query_analyses(self, since: str = None, until: str = None,
+                       min_scores: Dict[str, float] = None, max_scores: Dict[str, float] = None,
+                       products: list = None, sort_by: str = "timestamp", descending: bool = True,
+                       limit: int = 50, cursor: str = None) -> Dict[str, Any]:
+        """
+        Query stored analyses through the catalog's indexes (no analysis files are opened)
+        
+        Args:
+            since: Only analyses stored at or after this ISO timestamp
+            until: Only analyses stored before this ISO timestamp
+            min_scores: {score field: minimum}, fields from AnalysisCatalog.QUERY_COLUMNS
+            max_scores: {score field: maximum}
+            products: Product names that must all have been detected
+            sort_by: Any field of AnalysisCatalog.QUERY_COLUMNS
+            descending: Sort order
+            limit: Page size
+            cursor: next_cursor of the previous page
+        
+        Returns:
+            Dictionary with the page of analyses and the next cursor
+        """
+        entries, next_cursor = self.catalog.query(
+            since=since, until=until, min_scores=min_scores, max_scores=max_scores,
+            products=products or (), sort_by=sort_by, descending=descending,
+            limit=limit, cursor=cursor
+        )
+        analyses = []
+        for entry in entries:
+            analysis = {
+                'analysis_id': entry['analysis_id'],
+                'timestamp': entry['timestamp'],
+                'overall_score': entry['overall_score'],
+                'detected_products': entry['products']
+            }
+            analysis.update({column: entry[column] for column in AnalysisCatalog.SCORE_COLUMNS})
+            analyses.append(analysis)
+        return {"analyses": analyses, "next_cursor": next_cursor}
+
+    def _record_stats(self, sign: int, video_path: str, json_path: str, frames_path: str, report_path: str):
+        """Add (sign=1) or subtract (sign=-1) one analysis' files from the storage statistics (None paths are skipped)"""
+        deltas = {
+            "videos": (1, file_size(video_path)) if video_path else (0, 0),
+            "analysis_results": (1 if json_path else 0,
+                                 (file_size(json_path) if json_path else 0) + (file_size(frames_path) if frames_path else 0)),
+            "reports": (1, file_size(report_path)) if report_path else (0, 0)
+        }
         try:
-            analyses = []
-            results_dir = os.path.join(self.base_storage_path, "analysis_results")
+            self.stats.record({category: (sign * count, sign * size) for category, (count, size) in deltas.items()})
+        except Exception as e:
+            # The files are stored either way; the next audit corrects the totals
+            print(f"Warning: Could not update storage statistics: {str(e)}")
+
+    def delete_analysis(self, analysis_id: str) -> Dict[str, Any]:
+        """
+        Delete an analysis with its video, per-frame data and report
+        
+        Args:
+            analysis_id: Analysis ID to delete
             
-            for filename in os.listdir(results_dir):
-                if filename.endswith('.json'):
-                    analysis_id = filename.replace('.json', '')
-                    analysis_data = self.get_analysis_by_id(analysis_id)
-                    
-                    if 'error' not in analysis_data:
-                        analyses.append({
-                            'analysis_id': analysis_id,
-                            'timestamp': analysis_data.get('timestamp'),
-                            'overall_score': analysis_data.get('data', {}).get('metrics', {}).get('overall_effectiveness_score', 0)
-                        })
+        Returns:
+            Dictionary with success flag and the deleted files
+        """
+        try:
+            json_file_path = self.analysis_json_path(analysis_id)
+            if self.catalog.get(analysis_id) is None and not os.path.exists(json_file_path):
+                return {"success": False, "error": f"Analysis {analysis_id} not found"}
+
+            video_path = self.find_video_path(analysis_id)
+            frames_path = self.frame_series_path(analysis_id)
+            report_path = self.report_path(analysis_id)
+
+            existing = {
+                "video_path": video_path if video_path and os.path.exists(video_path) else None,
+                "json_path": json_file_path if os.path.exists(json_file_path) else None,
+                "frames_path": frames_path if os.path.exists(frames_path) else None,
+                "report_path": report_path if os.path.exists(report_path) else None
+            }
+            freed_bytes = sum(file_size(path) for path in existing.values() if path)
             
-            # Sort by timestamp (newest first)
-            analyses.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            return analyses
+            # Drop it from the catalog first so listings never show a half-deleted analysis
+            self.catalog.remove(analysis_id)
+            self._record_stats(-1, existing["video_path"], existing["json_path"],
+                               existing["frames_path"], existing["report_path"])
+            for path in existing.values():
+                if path:
+                    os.remove(path)
+            
+            print(f"Deleted analysis {analysis_id} ({freed_bytes} bytes)")
+            return {
+                "success": True,
+                "analysis_id": analysis_id,
+                "deleted_files": [path for path in existing.values() if path],
+                "freed_bytes": freed_bytes
+            }
             
         except Exception as e:
-            print(f"Error listing analyses: {str(e)}")
-            return []
\ No newline at end of file
+            print(f"Error deleting analysis: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    def audit_storage_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Recount the storage directories and reconcile the storage statistics
+        
+        This is the only operation that walks the storage tree; run it at
+        startup of a new store or periodically as a background audit.
+        
+        Returns:
+            Drift that was corrected per category (see StorageStats.reconcile)
+        """
+        scanned = {}
+        for category in self.STAT_CATEGORIES:
+            count, size = 0, 0
+            for entry in scan_files(os.path.join(self.base_storage_path, category)):
+                if entry.name.endswith(".tmp"):
+                    continue
+                # One analysis counts once, its per-frame .npz only adds bytes
+                if category != "analysis_results" or entry.name.endswith(".json"):
+                    count += 1
+                size += entry.stat(follow_symlinks=False).st_size
+            scanned[category] = (count, size)
+        
+        drift = self.stats.reconcile(scanned)
+        if any(values["count"] or values["bytes"] for values in drift.values()):
+            print(f"Storage statistics reconciled, drift: {drift}")
+        return drift
+
+    def storage_info(self) -> Dict[str, Any]:
+        """Storage counts and sizes from the maintained statistics (no directory scans)"""
+        totals = self.stats.totals()
+        def total(category, key):
+            return totals.get(category, {}).get(key, 0)
+        audited = [values["audited_at"] for values in totals.values() if values["audited_at"]]
+        return {
+            "storage_path": self.base_storage_path,
+            "videos_count": total("videos", "count"),
+            "analyses_count": total("analysis_results", "count"),
+            "reports_count": total("reports", "count"),
+            "videos_size_mb": total("videos", "bytes") / (1024 * 1024),
+            "analyses_size_mb": total("analysis_results", "bytes") / (1024 * 1024),
+            "reports_size_mb": total("reports", "bytes") / (1024 * 1024),
+            "last_audit": datetime.fromtimestamp(min(audited)).isoformat() if audited else None
+        }
+
+    def _flat_file_analysis_id(self, category: str, filename: str) -> Optional[tuple]:
+        """(analysis_id, kind) of a file in a flat storage directory, or None for unrelated files"""
+        if filename.endswith(".tmp"):
+            return None
+        if category == "videos":
+            return os.path.splitext(filename)[0], "video"
+        for kind, (kind_category, suffix) in self.ANALYSIS_FILES.items():
+            if kind_category == category and filename.endswith(suffix):
+                return filename[:-len(suffix)], kind
+        return None
+
+    def migrate_to_sharded_layout(self, dry_run: bool = False, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Move files from the flat storage directories into their shard directories
+        
+        Files are renamed (same volume, no copying) and the catalog paths are
+        updated in batches. The migration can be interrupted and re-run;
+        lookups find files in either place meanwhile. Totals in the storage
+        statistics are unaffected.
+        
+        Args:
+            dry_run: Only count the files that would be moved
+            batch_size: Catalog updates per transaction
+            
+        Returns:
+            Number of files moved (or to move) per storage directory
+        """
+        moved = {category: 0 for category in self.STAT_CATEGORIES}
+        for category in self.STAT_CATEGORIES:
+            category_dir = os.path.join(self.base_storage_path, category)
+            updates = []
+            with os.scandir(category_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    parsed = self._flat_file_analysis_id(category, entry.name)
+                    if parsed is None:
+                        continue
+                    analysis_id, kind = parsed
+                    moved[category] += 1
+                    if dry_run:
+                        continue
+                    
+                    target_dir = self.shard_dir(category, analysis_id)
+                    os.makedirs(target_dir, exist_ok=True)
+                    target_path = os.path.join(target_dir, entry.name)
+                    os.replace(entry.path, target_path)
+                    updates.append((analysis_id, self.CATALOG_PATH_COLUMNS[kind], target_path))
+                    
+                    if len(updates) >= batch_size:
+                        self.catalog.update_paths(updates)
+                        updates = []
+                        print(f"Migrated {moved[category]} files in {category}/")
+            if updates:
+                self.catalog.update_paths(updates)
+            print(f"{'Would migrate' if dry_run else 'Migrated'} {moved[category]} files in {category}/")
+        
+        if not dry_run:
+            self.flat_fallback = self._has_flat_files()
+        return moved
@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, Tuple
+
+
+class StorageStats:
+    def __init__(self, db_path: str):
+        """
+        Persistent file count / byte totals per storage category
+
+        Totals are adjusted by the code that stores or deletes files, so
+        reading them is constant-time no matter how many files are on disk.
+        Anything that bypasses those code paths (manual copies, crashes
+        between a file write and its update) is corrected by reconcile(),
+        which replaces the totals with the result of a full scan.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self):
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS storage_totals (
+                    category TEXT PRIMARY KEY,
+                    file_count INTEGER NOT NULL DEFAULT 0,
+                    total_bytes INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL,
+                    audited_at REAL
+                );
+            """)
+        finally:
+            conn.close()
+
+    @property
+    def needs_audit(self) -> bool:
+        """True until the totals have been established by a first scan"""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM storage_totals WHERE audited_at IS NOT NULL LIMIT 1").fetchone() is None
+        finally:
+            conn.close()
+
+    def record(self, deltas: Dict[str, Tuple[int, int]]):
+        """
+        Adjust totals in a single transaction
+
+        Args:
+            deltas: {category: (file count change, byte change)}; negative when files are removed
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for category, (count, size) in deltas.items():
+                conn.execute(
+                    "INSERT INTO storage_totals (category, file_count, total_bytes, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (category) DO UPDATE SET "
+                    "file_count = MAX(file_count + excluded.file_count, 0), "
+                    "total_bytes = MAX(total_bytes + excluded.total_bytes, 0), "
+                    "updated_at = excluded.updated_at",
+                    (category, int(count), int(size), now)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def totals(self) -> Dict[str, Dict[str, Any]]:
+        """Current totals as {category: {"count", "bytes", "updated_at", "audited_at"}}"""
+        conn = self._connect()
+        try:
+            return {
+                row["category"]: {
+                    "count": row["file_count"],
+                    "bytes": row["total_bytes"],
+                    "updated_at": row["updated_at"],
+                    "audited_at": row["audited_at"]
+                }
+                for row in conn.execute("SELECT * FROM storage_totals")
+            }
+        finally:
+            conn.close()
+
+    def reconcile(self, scanned: Dict[str, Tuple[int, int]]) -> Dict[str, Dict[str, int]]:
+        """
+        Replace the totals with the result of a full scan
+
+        Files stored or deleted while the scan was running may be missed or
+        counted twice; the next audit corrects that.
+
+        Args:
+            scanned: {category: (file count, bytes)} measured on disk
+
+        Returns:
+            Drift that was corrected, as {category: {"count", "bytes"}} (scanned minus recorded)
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            recorded = {
+                row["category"]: (row["file_count"], row["total_bytes"])
+                for row in conn.execute("SELECT category, file_count, total_bytes FROM storage_totals")
+            }
+            drift = {}
+            for category in set(recorded) | set(scanned):
+                count, size = scanned.get(category, (0, 0))
+                old_count, old_size = recorded.get(category, (0, 0))
+                drift[category] = {"count": count - old_count, "bytes": size - old_size}
+                conn.execute(
+                    "INSERT OR REPLACE INTO storage_totals (category, file_count, total_bytes, updated_at, audited_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (category, int(count), int(size), now, now)
+                )
+            conn.execute("COMMIT")
+            return drift
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+def scan_files(directory: str) -> Iterator[os.DirEntry]:
+    """Every regular file below a directory (recursive, one stat per file)"""
+    if not os.path.isdir(directory):
+        return
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def file_size(path: str) -> int:
+    """Size of a file, 0 if it does not exist"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,96 @@
+import numpy as np
+
+from vad import EnergyVAD
+
+SAMPLE_RATE = 16000
+
+
+def music_bed(seconds: float, seed: int = 0) -> np.ndarray:
+    """Sustained chords, a plucked melody, a kick drum on every beat and hi-hats in between"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = np.zeros_like(t)
+
+    chords = [[220.0, 277.2, 329.6], [196.0, 246.9, 293.7], [174.6, 220.0, 261.6], [164.8, 207.7, 246.9]]
+    for index in range(int(np.ceil(seconds / 2))):
+        envelope = np.clip(1 - np.abs((t - (index * 2 + 1)) / 1.1), 0, 1) ** 0.3
+        for frequency in chords[index % len(chords)]:
+            for harmonic in range(1, 7):
+                audio += envelope * np.sin(2 * np.pi * frequency * harmonic * t + rng.uniform(0, 2 * np.pi)) * 0.05 / harmonic
+
+    note_length = SAMPLE_RATE // 4
+    notes = rng.choice([440, 494, 523, 587, 659, 698, 784], size=len(t) // note_length + 1)
+    pitch = np.repeat(notes, note_length)[:len(t)]
+    pluck = np.tile(np.exp(-np.arange(note_length) / SAMPLE_RATE * 6), len(notes))[:len(t)]
+    audio += 0.08 * pluck * np.sin(2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE)
+
+    kick = np.exp(-np.arange(int(0.15 * SAMPLE_RATE)) / SAMPLE_RATE * 30) * np.sin(2 * np.pi * 60 * np.arange(int(0.15 * SAMPLE_RATE)) / SAMPLE_RATE)
+    hi_hat = np.diff(rng.normal(size=800 + 1)) * 0.03 * np.exp(-np.arange(800) / SAMPLE_RATE * 80)
+    for beat in np.arange(0, seconds, 0.5):
+        start = int(beat * SAMPLE_RATE)
+        audio[start:start + len(kick)] += 0.5 * kick[:len(audio) - start]
+        start = int((beat + 0.25) * SAMPLE_RATE)
+        audio[start:start + len(hi_hat)] += hi_hat[:max(len(audio) - start, 0)]
+
+    return (audio / np.abs(audio).max() * 0.5).astype(np.float32)
+
+
+def speech_like(seconds: float, seed: int = 1) -> np.ndarray:
+    """Words of 1-4 voiced syllables (gliding pitch), fricative onsets and pauses between words"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * SAMPLE_RATE)
+    parts, length = [], 0
+    while length < total:
+        for _ in range(rng.integers(1, 5)):
+            if rng.random() < 0.5:
+                n = int(rng.uniform(0.04, 0.1) * SAMPLE_RATE)
+                parts.append(np.diff(rng.normal(size=n + 1)) * 0.08 * np.hanning(n))
+            n = int(rng.uniform(0.1, 0.25) * SAMPLE_RATE)
+            pitch = np.linspace(rng.uniform(100, 200), rng.uniform(90, 220), n)
+            phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+            voiced = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 25))
+            parts.append(0.15 * voiced * np.hanning(n) ** 0.5)
+            parts.append(np.zeros(int(rng.uniform(0.01, 0.05) * SAMPLE_RATE)))
+        parts.append(np.zeros(int(rng.uniform(0.08, 0.4) * SAMPLE_RATE)))
+        length = sum(len(part) for part in parts)
+
+    audio = np.concatenate(parts)[:total] + rng.normal(size=total) * 0.0005
+    return (audio / np.abs(audio).max() * 0.5).astype(np.float32)
+
+
+def voiced_seconds(regions) -> float:
+    return sum(end - start for start, end in regions)
+
+
+def test_music_bed_is_not_speech():
+    vad = EnergyVAD(sample_rate=SAMPLE_RATE)
+    for seed in range(3):
+        assert vad.speech_regions(music_bed(30, seed=seed)) == []
+
+
+def test_music_bed_passes_level_test_without_music_filter():
+    # The fixture is loud throughout: only the speech/music check rejects it
+    vad = EnergyVAD(sample_rate=SAMPLE_RATE, music_filter=False)
+    assert voiced_seconds(vad.speech_regions(music_bed(30))) > 25
+
+
+def test_speech_over_music_bed_is_kept():
+    vad = EnergyVAD(sample_rate=SAMPLE_RATE)
+    audio = speech_like(30) + music_bed(30, seed=3) * 10 ** (-10 / 20)
+    assert voiced_seconds(vad.speech_regions(audio)) > 25
+
+
+def test_speech_between_music_is_located():
+    vad = EnergyVAD(sample_rate=SAMPLE_RATE)
+    audio = np.concatenate([music_bed(10, seed=2), speech_like(10, seed=9), music_bed(10, seed=4)])
+    regions = vad.speech_regions(audio)
+
+    assert regions
+    assert regions[0][0] > 7.5
+    assert regions[-1][1] < 22.5
+    assert voiced_seconds(regions) > 8
+
+
+def test_silence_is_not_speech():
+    vad = EnergyVAD(sample_rate=SAMPLE_RATE)
+    assert vad.speech_regions(np.zeros(SAMPLE_RATE * 5, dtype=np.float32)) == []
@@ -0,0 +1,176 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+
+def bbox_iou(a, b) -> float:
+    """Intersection over union of two [x1, y1, x2, y2] boxes"""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    if inter <= 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+class KalmanBoxTrack:
+    """Constant-velocity Kalman filter over a box centre, width and height"""
+
+    # State: [cx, cy, w, h, vx, vy]; measurement: [cx, cy, w, h]
+    F = np.eye(6)
+    F[0, 4] = F[1, 5] = 1.0
+    H = np.eye(4, 6)
+    Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.5, 0.5])
+    R = np.diag([4.0, 4.0, 10.0, 10.0])
+
+    def __init__(self, track_id: int, bbox, label: str, frame_number: int):
+        self.track_id = track_id
+        self.label = label
+        self.x = np.zeros(6)
+        self.x[:4] = self.to_measurement(bbox)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 100.0, 100.0])
+
+        self.hits = 1
+        self.misses = 0
+        self.duration = 0.0
+        self.first_frame = frame_number
+        self.last_frame = frame_number
+
+    @staticmethod
+    def to_measurement(bbox) -> np.ndarray:
+        x1, y1, x2, y2 = bbox
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=float)
+
+    def predict(self):
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+
+    def update(self, bbox, frame_number: int):
+        z = self.to_measurement(bbox)
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(6) - K @ self.H) @ self.P
+
+        self.hits += 1
+        self.misses = 0
+        self.last_frame = frame_number
+
+    @property
+    def bbox(self) -> List[float]:
+        cx, cy, w, h = self.x[:4]
+        return [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+
+
+class IoUTracker:
+    def __init__(self, iou_threshold: float = 0.3, max_age: int = 15):
+        """
+        Lightweight multi-object tracker with stable track IDs
+
+        Detections are matched greedily to Kalman-predicted tracks of the same
+        label by IoU. All totals are kept as running sums, so each update costs
+        O(active tracks x detections) regardless of how long the video is.
+
+        Args:
+            iou_threshold: Minimum IoU for a detection to continue a track
+            max_age: Frames a track may go unmatched before it is retired
+        """
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+
+        self.active_tracks: List[KalmanBoxTrack] = []
+        self.finished_tracks: List[KalmanBoxTrack] = []
+        self.next_track_id = 1
+        self.frame_number = 0
+
+        # Running totals (never re-summed)
+        self.on_screen_time = 0.0       # time with at least one object visible
+        self.total_track_time = 0.0     # sum of per-track on-screen durations
+        self.product_screen_time: Dict[str, float] = {}
+
+    def update(self, detections: List[Tuple[list, str]], frame_time: float) -> List[int]:
+        """
+        Advance the tracker by one frame
+
+        Args:
+            detections: List of ([x1, y1, x2, y2], label) for this frame
+            frame_time: Duration of the frame in seconds
+
+        Returns:
+            Track ID assigned to each detection, in input order
+        """
+        self.frame_number += 1
+        for track in self.active_tracks:
+            track.predict()
+
+        # Greedy IoU matching, best pairs first
+        candidates = []
+        for t_idx, track in enumerate(self.active_tracks):
+            predicted = track.bbox
+            for d_idx, (bbox, label) in enumerate(detections):
+                if label != track.label:
+                    continue
+                iou = bbox_iou(predicted, bbox)
+                if iou >= self.iou_threshold:
+                    candidates.append((iou, t_idx, d_idx))
+        candidates.sort(reverse=True)
+
+        assigned_tracks = set()
+        assignments = [None] * len(detections)
+        for iou, t_idx, d_idx in candidates:
+            if t_idx in assigned_tracks or assignments[d_idx] is not None:
+                continue
+            track = self.active_tracks[t_idx]
+            track.update(detections[d_idx][0], self.frame_number)
+            assigned_tracks.add(t_idx)
+            assignments[d_idx] = track
+
+        for d_idx, (bbox, label) in enumerate(detections):
+            if assignments[d_idx] is None:
+                track = KalmanBoxTrack(self.next_track_id, bbox, label, self.frame_number)
+                self.next_track_id += 1
+                self.active_tracks.append(track)
+                assignments[d_idx] = track
+
+        # Per-track and per-product screen time for this frame
+        visible_labels = set()
+        for track in assignments:
+            track.duration += frame_time
+            self.total_track_time += frame_time
+            visible_labels.add(track.label)
+        for label in visible_labels:
+            self.product_screen_time[label] = self.product_screen_time.get(label, 0.0) + frame_time
+        if detections:
+            self.on_screen_time += frame_time
+
+        # Age out tracks that were not seen this frame
+        matched = {id(track) for track in assignments}
+        still_active = []
+        for track in self.active_tracks:
+            if id(track) not in matched:
+                track.misses += 1
+            if track.misses > self.max_age:
+                self.finished_tracks.append(track)
+            else:
+                still_active.append(track)
+        self.active_tracks = still_active
+
+        return [track.track_id for track in assignments]
+
+    @property
+    def track_count(self) -> int:
+        return self.next_track_id - 1
+
+    def summary(self, frame_time: float, limit: int = 50) -> List[Dict]:
+        """Per-track summaries, longest on screen first"""
+        tracks = sorted(self.finished_tracks + self.active_tracks, key=lambda t: t.duration, reverse=True)
+        return [{
+            "track_id": track.track_id,
+            "product": track.label,
+            "duration": track.duration,
+            "first_seen": (track.first_frame - 1) * frame_time,
+            "last_seen": track.last_frame * frame_time,
+            "hits": track.hits
+        } for track in tracks[:limit]]
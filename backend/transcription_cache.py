@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+class TranscriptionCache:
+    def __init__(self, cache_dir: str, max_memory_entries: int = 128):
+        """
+        Two-tier (in-memory LRU + on-disk JSON) cache of Whisper transcriptions
+
+        Args:
+            cache_dir: Directory for the persistent tier
+            max_memory_entries: Number of transcripts kept in the in-memory LRU
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def audio_digest(audio) -> str:
+        """
+        Content hash of an audio track
+
+        Args:
+            audio: Path to an audio file or a NumPy sample buffer
+
+        Returns:
+            Hex SHA-256 digest of the audio content
+        """
+        digest = hashlib.sha256()
+        if isinstance(audio, np.ndarray):
+            digest.update(str(audio.dtype).encode())
+            digest.update(np.ascontiguousarray(audio).tobytes())
+        else:
+            with open(audio, "rb") as audio_file:
+                for chunk in iter(lambda: audio_file.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(audio_digest: str, model_name: str, options: Dict[str, Any]) -> str:
+        """Cache key over audio content, model name and transcription options"""
+        payload = json.dumps({
+            "audio": audio_digest,
+            "model": model_name,
+            "options": options
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        disk_path = self._disk_path(key)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            with open(disk_path, "r", encoding="utf-8") as cache_file:
+                value = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable transcription cache entry {disk_path}: {str(e)}")
+            return None
+
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        self._remember(key, value)
+
+        disk_path = self._disk_path(key)
+        os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+        tmp_path = f"{disk_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(value, cache_file, ensure_ascii=False)
+            os.replace(tmp_path, disk_path)
+        except OSError as e:
+            print(f"Warning: Could not persist transcription cache entry: {str(e)}")
+
+    def get_or_transcribe(self, audio, model_name: str, transcribe_fn: Callable[..., Dict[str, Any]],
+                          **options) -> Dict[str, Any]:
+        """
+        Return the cached transcript for this audio, running Whisper only on a miss
+
+        Args:
+            audio: Audio file path or NumPy buffer passed to transcribe_fn
+            model_name: Name of the Whisper checkpoint (part of the key)
+            transcribe_fn: Callable(audio, **options) returning a Whisper result dict
+            **options: Transcription options (part of the key)
+
+        Returns:
+            Dictionary with text, segments and language
+        """
+        key = self.make_key(self.audio_digest(audio), model_name, options)
+        cached = self.get(key)
+        if cached is not None:
+            print("Transcription cache hit")
+            return cached
+
+        result = transcribe_fn(audio, **options)
+        value = {
+            "text": result.get("text", ""),
+            "language": result.get("language"),
+            "segments": [
+                {
+                    "start": float(segment["start"]),
+                    "end": float(segment["end"]),
+                    "text": segment["text"]
+                }
+                for segment in result.get("segments", [])
+            ]
+        }
+        self.put(key, value)
+        return value
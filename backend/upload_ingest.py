@@ -0,0 +1,174 @@
+import hashlib
+import os
+from typing import Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+
+class UploadError(Exception):
+    """Raised when an upload is malformed or rejected"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StreamedUpload:
+    def __init__(self, path: str, content_hash: str, size: int,
+                 filename: Optional[str], content_type: Optional[str]):
+        """
+        A request body that was streamed to disk
+
+        Args:
+            path: Where the file was written
+            content_hash: Hex SHA-256 of the file content
+            size: Size in bytes
+            filename: Client-supplied filename, if any
+            content_type: Client-supplied content type, if any
+        """
+        self.path = path
+        self.content_hash = content_hash
+        self.size = size
+        self.filename = filename
+        self.content_type = content_type
+
+
+class _FileSink:
+    """Writes chunks to disk while hashing and enforcing the size limit"""
+
+    def __init__(self, dest_path: str, max_bytes: Optional[int]):
+        self.dest_path = dest_path
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.file = open(dest_path, "wb")
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise UploadError(f"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit", status_code=413)
+        self.digest.update(data)
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+
+async def stream_upload_to_disk(request, dest_path: str, field_name: str = "video",
+                                max_bytes: Optional[int] = None,
+                                content_type_prefix: Optional[str] = None) -> StreamedUpload:
+    """
+    Stream an upload straight from the request body to disk
+
+    Accepts either multipart/form-data (the file in `field_name`) or a raw body.
+    Chunks are parsed, hashed and written as they arrive, so memory use per
+    upload is constant regardless of file size.
+
+    Args:
+        request: Starlette/FastAPI Request
+        dest_path: Where to write the file
+        field_name: Multipart field holding the file
+        max_bytes: Reject uploads larger than this (HTTP 413)
+        content_type_prefix: Required content type prefix of the file, e.g. "video/"
+
+    Returns:
+        StreamedUpload describing the written file
+    """
+    header_value = request.headers.get("content-type", "")
+    body_type, params = parse_options_header(header_value)
+    body_type = body_type.decode("latin-1") if isinstance(body_type, bytes) else body_type
+
+    declared_length = request.headers.get("content-length")
+    if max_bytes is not None and declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+        raise UploadError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit", status_code=413)
+
+    sink = None
+    try:
+        if body_type != "multipart/form-data":
+            # Raw body upload: the request content type is the file's type
+            if content_type_prefix and not body_type.startswith(content_type_prefix):
+                raise UploadError(f"File must be {content_type_prefix}*")
+            sink = _FileSink(dest_path, max_bytes)
+            async for chunk in request.stream():
+                sink.write(chunk)
+            filename, file_content_type = None, body_type
+        else:
+            boundary = params.get(b"boundary")
+            if not boundary:
+                raise UploadError("Missing multipart boundary")
+
+            state = {
+                "headers": {},
+                "header_field": b"",
+                "header_value": b"",
+                "target": False,
+                "found": False,
+                "filename": None,
+                "content_type": None
+            }
+
+            def on_part_begin():
+                state["headers"] = {}
+                state["target"] = False
+
+            def on_header_field(data, start, end):
+                state["header_field"] += data[start:end]
+
+            def on_header_value(data, start, end):
+                state["header_value"] += data[start:end]
+
+            def on_header_end():
+                state["headers"][state["header_field"].lower()] = state["header_value"]
+                state["header_field"] = b""
+                state["header_value"] = b""
+
+            def on_headers_finished():
+                nonlocal sink
+                _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+                if disposition.get(b"name", b"").decode("latin-1") != field_name or state["found"]:
+                    return
+
+                part_type = state["headers"].get(b"content-type", b"").decode("latin-1")
+                if content_type_prefix and not part_type.startswith(content_type_prefix):
+                    raise UploadError(f"File must be {content_type_prefix}*")
+
+                filename = disposition.get(b"filename")
+                state["filename"] = filename.decode("utf-8", "replace") if filename else None
+                state["content_type"] = part_type
+                state["target"] = True
+                state["found"] = True
+                sink = _FileSink(dest_path, max_bytes)
+
+            def on_part_data(data, start, end):
+                if state["target"]:
+                    sink.write(data[start:end])
+
+            def on_part_end():
+                state["target"] = False
+
+            parser = MultipartParser(boundary, {
+                "on_part_begin": on_part_begin,
+                "on_header_field": on_header_field,
+                "on_header_value": on_header_value,
+                "on_header_end": on_header_end,
+                "on_headers_finished": on_headers_finished,
+                "on_part_data": on_part_data,
+                "on_part_end": on_part_end,
+            })
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+
+            if not state["found"]:
+                raise UploadError(f"Missing '{field_name}' file field")
+            filename, file_content_type = state["filename"], state["content_type"]
+
+        sink.close()
+        return StreamedUpload(dest_path, sink.digest.hexdigest(), sink.size, filename, file_content_type)
+
+    except BaseException:
+        if sink is not None:
+            sink.close()
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
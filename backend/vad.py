@@ -0,0 +1,173 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+class EnergyVAD:
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, threshold_db: float = -45.0,
+                 noise_margin_db: float = 10.0, speech_range_db: float = 20.0, min_speech_ms: int = 250, min_silence_ms: int = 300,
+                 pad_ms: int = 150, music_filter: bool = True, context_ms: int = 1500,
+                 min_low_energy_ratio: float = 0.15, min_zcr_variation: float = 0.8):
+        """
+        Cheap energy-based voice activity detector with a speech/music check
+
+        A frame counts as voiced when its RMS level is above an absolute floor
+        and above the clip's noise floor (10th percentile level) plus a margin.
+        The relative threshold never rises above the loud level (90th
+        percentile) minus speech_range_db, so clips that are voiced
+        throughout are not cut down to their peaks.
+
+        Loud is not the same as speech: a music bed passes the level test
+        throughout. With music_filter, a frame must also lie in a speech-like
+        context window (see speech_like_frames), judged by two classic
+        speech/music features: the share of low-energy frames (syllable dips
+        and pauses, which sustained music lacks) and the variation of the
+        zero-crossing rate (speech alternates voiced and unvoiced sounds).
+        Speech over a music bed keeps both properties.
+
+        Short gaps are bridged and short bursts dropped before regions are padded.
+
+        Args:
+            sample_rate: Sample rate of the audio
+            frame_ms: Analysis frame length in milliseconds
+            threshold_db: Absolute level (dBFS) below which a frame is silent
+            noise_margin_db: Required level above the estimated noise floor
+            speech_range_db: Level range below the loud level still counted as speech
+            min_speech_ms: Voiced runs shorter than this are ignored
+            min_silence_ms: Silent gaps shorter than this are bridged
+            pad_ms: Padding added around each region
+            music_filter: Require speech-like context windows (rejects music beds)
+            context_ms: Length of the speech/music context windows
+            min_low_energy_ratio: Share of 10 ms frames below half the window's mean RMS
+                at or above which a window is speech-like
+            min_zcr_variation: Zero-crossing-rate coefficient of variation at or
+                above which a window is speech-like
+        """
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.speech_range_db = speech_range_db
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.min_silence_frames = max(1, int(min_silence_ms / frame_ms))
+        self.pad_frames = int(pad_ms / frame_ms)
+        self.music_filter = music_filter
+        self.feature_length = max(1, int(sample_rate * 0.01))
+        self.context_frames = max(2, int(context_ms / 10))
+        self.min_low_energy_ratio = min_low_energy_ratio
+        self.min_zcr_variation = min_zcr_variation
+
+    def frame_levels(self, audio: np.ndarray) -> np.ndarray:
+        """RMS level in dBFS of each analysis frame"""
+        n_frames = len(audio) // self.frame_length
+        if n_frames == 0:
+            return np.zeros(0)
+        frames = audio[:n_frames * self.frame_length].reshape(n_frames, self.frame_length)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+        return 20 * np.log10(rms + 1e-10)
+
+    def speech_like_frames(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Per-frame speech (vs. music) decision from the surrounding context
+
+        Features are computed on 10 ms frames over context windows of
+        context_ms (hop one third of that). A window is speech-like when its
+        low-energy ratio or its zero-crossing-rate variation reaches the
+        configured minimum; an analysis frame is speech-like when any window
+        covering it is.
+
+        Returns:
+            Boolean array with one entry per analysis frame
+        """
+        n_frames = len(audio) // self.frame_length
+        n_features = len(audio) // self.feature_length
+        if n_frames == 0 or n_features == 0:
+            return np.zeros(n_frames, dtype=bool)
+
+        frames = audio[:n_features * self.feature_length].reshape(n_features, self.feature_length).astype(np.float64)
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        zcr = np.mean(np.abs(np.diff(np.signbit(frames).astype(np.int8), axis=1)), axis=1)
+
+        context = min(self.context_frames, n_features)
+        hop = max(1, context // 3)
+        starts = list(range(0, n_features - context + 1, hop))
+        if starts[-1] + context < n_features:
+            starts.append(n_features - context)
+
+        speech_like = np.zeros(n_features, dtype=bool)
+        for start in starts:
+            window_rms = rms[start:start + context]
+            window_zcr = zcr[start:start + context]
+            low_energy_ratio = np.mean(window_rms < 0.5 * window_rms.mean()) if window_rms.mean() > 0 else 0.0
+            zcr_variation = window_zcr.std() / window_zcr.mean() if window_zcr.mean() > 0 else 0.0
+            if low_energy_ratio >= self.min_low_energy_ratio or zcr_variation >= self.min_zcr_variation:
+                speech_like[start:start + context] = True
+
+        # Map 10 ms feature frames onto analysis frames (any speech-like part counts)
+        positions = np.arange(n_frames) * self.frame_length
+        first = positions // self.feature_length
+        last = np.minimum((positions + self.frame_length - 1) // self.feature_length, n_features - 1)
+        cumulative = np.concatenate(([0], np.cumsum(speech_like)))
+        return cumulative[np.minimum(last + 1, n_features)] - cumulative[np.minimum(first, n_features)] > 0
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Per-frame voiced/silent decision, after gap bridging and burst removal
+
+        Returns:
+            Boolean array with one entry per analysis frame
+        """
+        levels = self.frame_levels(audio)
+        if levels.size == 0:
+            return np.zeros(0, dtype=bool)
+
+        noise_floor, loud_level = np.percentile(levels, [10, 90])
+        relative = min(noise_floor + self.noise_margin_db, loud_level - self.speech_range_db)
+        threshold = max(self.threshold_db, float(relative))
+        mask = levels > threshold
+        if self.music_filter:
+            mask &= self.speech_like_frames(audio)
+
+        # Bridge short silences between voiced frames, then drop short voiced bursts
+        for start, end in self._runs(mask, False):
+            if end - start < self.min_silence_frames and start > 0 and end < len(mask):
+                mask[start:end] = True
+        for start, end in self._runs(mask, True):
+            if end - start < self.min_speech_frames:
+                mask[start:end] = False
+        return mask
+
+    def speech_regions(self, audio: np.ndarray) -> List[Tuple[float, float]]:
+        """
+        Voiced regions of the audio
+
+        Returns:
+            List of (start_seconds, end_seconds), padded and merged
+        """
+        mask = self.speech_mask(audio)
+        frame_seconds = self.frame_length / self.sample_rate
+        duration = len(audio) / self.sample_rate
+
+        regions = []
+        for start, end in self._runs(mask, True):
+            start = max(0, start - self.pad_frames) * frame_seconds
+            end = min(duration, (end + self.pad_frames) * frame_seconds)
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], end)
+            else:
+                regions.append((start, end))
+        return regions
+
+    def speech_fraction(self, mask: np.ndarray, start_sample: int, end_sample: int) -> float:
+        """Fraction of voiced frames between two sample offsets"""
+        start = start_sample // self.frame_length
+        end = max(start + 1, end_sample // self.frame_length)
+        window = mask[start:end]
+        return float(window.mean()) if window.size else 0.0
+
+    @staticmethod
+    def _runs(mask: np.ndarray, value: bool) -> List[Tuple[int, int]]:
+        """[start, end) frame ranges where mask equals value"""
+        padded = np.concatenate(([False], mask == value, [False]))
+        edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+        return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
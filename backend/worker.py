@@ -0,0 +1,44 @@
+import os
+import socket
+import time
+from dotenv import load_dotenv
+
+# Load environment variables before app reads its configuration
+load_dotenv()
+
+from app import (
+    job_queue,
+    model_registry,
+    run_queued_job,
+    VIDEO_ANALYSIS_JOB,
+    JOB_LEASE_SECONDS,
+    JOB_POLL_SECONDS,
+)
+
+
+def run_worker():
+    """
+    Standalone analysis worker: pulls video analysis jobs from the shared job
+    queue and runs them in this process. Start as many as the node can hold.
+    Workers must run on the same host as the API: the SQLite job queue is not
+    safe to share over a network filesystem, and they also need the same
+    storage volume and upload directory.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {worker_id} warming up models...")
+    model_registry.warm_up()
+    print(f"Worker {worker_id} waiting for jobs")
+
+    while True:
+        job = job_queue.claim(worker_id, [VIDEO_ANALYSIS_JOB], JOB_LEASE_SECONDS)
+        if job is None:
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+
+        print(f"Worker {worker_id} running job {job['job_id']} (attempt {job['attempts']})")
+        status = run_queued_job(job, worker_id)
+        print(f"Job {job['job_id']} finished with status: {status or 'lease lost'}")
+
+
+if __name__ == "__main__":
+    run_worker()
@@ -60,51 +60,96 @@ export default function AnalyzePage() {
       
       const { task_id } = await startResponse.json();
       
-      // Poll for results
-      let attempts = 0;
-      const maxAttempts = 60; // 60 attempts with 5s interval = 5 minutes max
-      let analysisResults = null;
-      
-      while (attempts < maxAttempts && !analysisResults) {
-        attempts++;
-        
-        const statusResponse = await fetch(`http://localhost:8000/analysis-status/${task_id}`);
-        if (!statusResponse.ok) {
-          throw new Error('Failed to check analysis status');
-        }
-        
-        const statusData = await statusResponse.json();
-        
-        // Update progress
-        if (statusData.progress !== undefined) {
-          setProgress(statusData.progress);
-        }
-        
-        // Update progress message based on progress
-        if (statusData.progress < 40) {
-          setProgressMessage(`Processing video frames... (${Math.round(statusData.progress)}%)`);
-        } else if (statusData.progress < 55) {
-          setProgressMessage(`Extracting audio... (${Math.round(statusData.progress)}%)`);
-        } else if (statusData.progress < 80) {
-          setProgressMessage(`Transcribing audio... (${Math.round(statusData.progress)}%)`);
-        } else if (statusData.progress < 90) {
-          setProgressMessage(`Analyzing content... (${Math.round(statusData.progress)}%)`);
-        } else {
-          setProgressMessage(`Finalizing results... (${Math.round(statusData.progress)}%)`);
-        }
-        
-        if (statusData.status === 'completed') {
-          analysisResults = statusData.results;
-          break;
-        } else if (statusData.status === 'failed') {
-          throw new Error(statusData.message || 'Analysis failed');
-        }
-        
-        await new Promise(resolve => setTimeout(resolve, 5000)); // Wait 5 seconds
-      }
+      // Follow progress over Server-Sent Events; results are fetched once at the end
+      const analysisResults = await new Promise<any>((resolve, reject) => {
+        const events = new EventSource(`http://localhost:8000/analysis-events/${task_id}`);
+        const timeout = setTimeout(() => {
+          events.close();
+          reject(new Error('Analysis timed out'));
+        }, 30 * 60 * 1000);
+
+        const finish = () => {
+          clearTimeout(timeout);
+          events.close();
+        };
+
+        const fetchResults = async (resultsUrl: string) => {
+          const resultsResponse = await fetch(`http://localhost:8000${resultsUrl}`);
+          if (!resultsResponse.ok) {
+            throw new Error('Failed to fetch analysis results');
+          }
+          const { results } = await resultsResponse.json();
+          return results;
+        };
+
+        events.addEventListener('progress', (e) => {
+          const statusData = JSON.parse((e as MessageEvent).data);
+          const percent = Math.round(statusData.progress ?? 0);
+          setProgress(statusData.progress ?? 0);
+
+          // Update progress message based on the running stage
+          switch (statusData.stage) {
+            case 'visual':
+              setProgressMessage(`Processing video frames... (${percent}%)`);
+              break;
+            case 'audio':
+              setProgressMessage(`Extracting audio... (${percent}%)`);
+              break;
+            case 'transcribe':
+              setProgressMessage(`Transcribing audio... (${percent}%)`);
+              break;
+            case 'storage':
+              setProgressMessage(`Finalizing results... (${percent}%)`);
+              break;
+            default:
+              setProgressMessage(statusData.job_status === 'queued'
+                ? 'Waiting for a free worker...'
+                : `Analyzing content... (${percent}%)`);
+          }
+        });
+
+        events.addEventListener('completed', async (e) => {
+          finish();
+          try {
+            const { results_url } = JSON.parse((e as MessageEvent).data);
+            resolve(await fetchResults(results_url));
+          } catch (err) {
+            reject(err);
+          }
+        });
+
+        events.addEventListener('failed', (e) => {
+          finish();
+          const statusData = JSON.parse((e as MessageEvent).data);
+          reject(new Error(statusData.message || 'Analysis failed'));
+        });
+
+        // The browser reconnects on its own while readyState is CONNECTING; once
+        // it gives up (e.g. the task is unknown) check the status one last time
+        events.onerror = async () => {
+          if (events.readyState !== EventSource.CLOSED) return;
+          finish();
+          try {
+            const statusResponse = await fetch(`http://localhost:8000/analysis-status/${task_id}`);
+            if (!statusResponse.ok) {
+              throw new Error('Lost connection to the analysis progress stream');
+            }
+            const statusData = await statusResponse.json();
+            if (statusData.status === 'completed') {
+              resolve(await fetchResults(statusData.results_url));
+            } else if (statusData.status === 'failed') {
+              reject(new Error(statusData.message || 'Analysis failed'));
+            } else {
+              reject(new Error('Lost connection to the analysis progress stream'));
+            }
+          } catch (err) {
+            reject(err);
+          }
+        };
+      });
       
       if (!analysisResults) {
-        throw new Error('Analysis timed out');
+        throw new Error('Analysis returned no results');
       }
       
       setResults(analysisResults);
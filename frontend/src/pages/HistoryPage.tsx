@@ -5,6 +5,9 @@ const API_BASE_URL = 'http://localhost:8000'; // Update with your backend URL
 
 export default function HistoryPage() {
   const [analyses, setAnalyses] = useState([]);
+  const [totalAnalyses, setTotalAnalyses] = useState(0);
+  const [nextOffset, setNextOffset] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [selectedAnalysis, setSelectedAnalysis] = useState(null);
@@ -25,6 +28,8 @@ export default function HistoryPage() {
       
       const data = await response.json();
       setAnalyses(data.analyses || []);
+      setTotalAnalyses(data.total_analyses || 0);
+      setNextOffset(data.next_offset ?? null);
     } catch (err) {
       setError(err.message);
       console.error('Error fetching history:', err);
@@ -33,6 +38,28 @@ export default function HistoryPage() {
     }
   };
 
+  const fetchMoreAnalyses = async () => {
+    if (nextOffset === null) return;
+    try {
+      setLoadingMore(true);
+      const response = await fetch(`${API_BASE_URL}/storage/analyses?offset=${nextOffset}`);
+
+      if (!response.ok) {
+        throw new Error('Failed to fetch analysis history');
+      }
+
+      const data = await response.json();
+      setAnalyses((current) => [...current, ...(data.analyses || [])]);
+      setTotalAnalyses(data.total_analyses || 0);
+      setNextOffset(data.next_offset ?? null);
+    } catch (err) {
+      setError(err.message);
+      console.error('Error fetching history:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchAnalysisDetails = async (analysisId) => {
     try {
       const response = await fetch(`${API_BASE_URL}/storage/analysis/${analysisId}`);
@@ -126,7 +153,7 @@ export default function HistoryPage() {
       <div className="flex justify-between items-center mb-8">
         <h1 className="text-3xl font-bold text-white">Analysis History</h1>
         <div className="text-gray-400">
-          {analyses.length} analysis{analyses.length !== 1 ? 'es' : ''} stored
+          {totalAnalyses} analysis{totalAnalyses !== 1 ? 'es' : ''} stored
         </div>
       </div>
 
@@ -225,6 +252,18 @@ export default function HistoryPage() {
         </div>
       )}
 
+      {nextOffset !== null && (
+        <div className="mt-6 text-center">
+          <button
+            onClick={fetchMoreAnalyses}
+            disabled={loadingMore}
+            className="px-4 py-2 bg-purple-600 text-white rounded-lg hover:bg-purple-700 transition-colors disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : `Load more (${analyses.length} of ${totalAnalyses})`}
+          </button>
+        </div>
+      )}
+
       {/* Analysis Details Modal */}
       {showDetails && selectedAnalysis && (
         <div className="fixed inset-0 bg-black/80 backdrop-blur-sm flex items-center justify-center p-4 z-50">